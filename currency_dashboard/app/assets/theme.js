@@ -0,0 +1,55 @@
+// Клиентские функции dashboard: переключение темы без запросов к серверу, ссылка выгрузки и замер ширины графика
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    theme: {
+        // Класс корневого контейнера; все стили тем описаны в custom.css
+        containerClass: function (theme) {
+            return theme === "dark" ? "dark-theme" : "";
+        },
+
+        // Перекрашивает уже построенный график: шаблон, фон, шрифт и основную серию
+        applyFigureTheme: function (theme, figure, config) {
+            if (!figure || !config) {
+                return window.dash_clientside.no_update;
+            }
+            var settings = config.figure[theme] || config.figure.light;
+            var oldLayout = figure.layout || {};
+            var layout = Object.assign({}, oldLayout, settings.layout, {
+                template: settings.template,
+                font: Object.assign({}, oldLayout.font, settings.layout.font)
+            });
+            var data = (figure.data || []).map(function (trace) {
+                if (trace.meta !== config.primary_trace) {
+                    return trace;
+                }
+                return Object.assign({}, trace, {
+                    line: Object.assign({}, trace.line, {color: settings.line_color}),
+                    marker: Object.assign({}, trace.marker, {color: settings.marker_color})
+                });
+            });
+            return Object.assign({}, figure, {data: data, layout: layout});
+        }
+    },
+    export: {
+        // Ссылка на потоковую выгрузку /export; без пары и периода кнопка неактивна
+        link: function (pairId, startDate, endDate, format, allPairs) {
+            var pairs = allPairs && allPairs.length ? "all" : pairId;
+            if (!pairs || !startDate || !endDate) {
+                return ["", "btn btn-success disabled"];
+            }
+            var params = new URLSearchParams({
+                pairs: pairs,
+                start: startDate.slice(0, 10),
+                end: endDate.slice(0, 10),
+                format: format || "csv"
+            });
+            return ["/export?" + params.toString(), "btn btn-success"];
+        }
+    },
+    graph: {
+        // Ширина области графика в пикселях — столько точек имеет смысл отдавать с сервера
+        width: function (graphId) {
+            var element = document.getElementById(graphId);
+            return element && element.offsetWidth ? element.offsetWidth : window.innerWidth;
+        }
+    }
+});
@@ -0,0 +1,151 @@
+import time as timer
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, time, timedelta
+import numpy as np
+from app.cache import rate_cache
+from app.config import HTTP_MAX_WORKERS
+from app.coverage import covered_intervals, last_settled_day, mark_covered, missing_ranges
+from app.db import SessionLocal
+from app.db.models import BaseRateRange, CoveredRange, CurrencyPair
+from app.db.rates import upsert_rates
+from app.fetchers.base import get_or_create_source, round_rate
+from app.fetchers.registry import get_primary_provider
+from app.rollups import refresh_rollups
+from app.triangulation import TRIANGULATION_BASE, load_vectors, store_vectors
+
+# Первый день публикации курсов ЕЦБ
+HISTORY_START = date(1999, 1, 4)
+# Строк exchange_rates в одном INSERT
+BATCH_SIZE = 10000
+
+
+def year_chunks(start, end):
+    """Делит период [start, end] на части по календарным годам"""
+    chunks = []
+    cursor = start
+    while cursor <= end:
+        chunk_end = min(end, date(cursor.year, 12, 31))
+        chunks.append((cursor, chunk_end))
+        cursor = chunk_end + timedelta(days=1)
+    return chunks
+
+
+def resolve_pairs(session, spec):
+    """Пары для загрузки: "all", id через запятую или коды вида USD/EUR"""
+    query = session.query(CurrencyPair).order_by(CurrencyPair.id)
+    if spec == "all":
+        return query.all()
+    pairs = []
+    for item in (part.strip() for part in spec.split(",")):
+        if not item:
+            continue
+        if "/" in item:
+            base, target = item.upper().split("/", 1)
+            pair = query.filter_by(base_currency=base, target_currency=target).first()
+        else:
+            pair = query.filter_by(id=int(item)).first()
+        if not pair:
+            raise ValueError(f"Пара не найдена: {item}")
+        pairs.append(pair)
+    return pairs
+
+
+def _fetch_vectors(session, chunks, workers):
+    """Загружает векторы базовых курсов по годам параллельно, каждый год сохраняется сразу"""
+    covered = covered_intervals(session, BaseRateRange)
+    gaps = [gap for chunk in chunks for gap in missing_ranges(covered, *chunk)]
+    done = sum(1 for chunk in chunks if not missing_ranges(covered, *chunk))
+    print(f"[INFO] Векторы базовых курсов: загрузить {len(gaps)} интервалов, уже в БД {done} лет")
+
+    provider = get_primary_provider()
+    failed = 0
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="backfill") as pool:
+        futures = {
+            pool.submit(provider.fetch_base_series, TRIANGULATION_BASE, *gap): gap
+            for gap in gaps
+        }
+        # Запись — в этом потоке по мере готовности: прерванный запуск сохраняет готовые годы
+        for future in as_completed(futures):
+            gap_start, gap_end = futures[future]
+            try:
+                vectors = future.result()
+                store_vectors(session, gap_start, gap_end, vectors)
+                print(f"[OK] Базовые курсы {gap_start}..{gap_end}: {len(vectors)} дней")
+            except Exception as e:
+                session.rollback()
+                failed += 1
+                print(f"[WARN] Не удалось загрузить базовые курсы за {gap_start}..{gap_end}: {e}")
+    return failed
+
+
+def _store_pairs(session, pairs, chunks, source_id):
+    """Выводит курсы пар из векторов и пишет их в exchange_rates, по транзакции на год"""
+    base_covered = covered_intervals(session, BaseRateRange)
+    pair_covered = {pair.id: covered_intervals(session, CoveredRange, pair_id=pair.id) for pair in pairs}
+    written = 0
+    for chunk_start, chunk_end in chunks:
+        if missing_ranges(base_covered, chunk_start, chunk_end):
+            print(f"[WARN] Нет базовых курсов за {chunk_start}..{chunk_end}, год пропущен")
+            continue
+        pending = [
+            pair for pair in pairs
+            if missing_ranges(pair_covered[pair.id], chunk_start, chunk_end)
+        ]
+        if not pending:
+            continue
+
+        # Курсы всех пар года — одна операция над матрицей векторов
+        vectors = load_vectors(session, chunk_start, chunk_end)
+        cross = vectors.cross([(pair.base_currency, pair.target_currency) for pair in pending])
+        days, columns = np.nonzero(~np.isnan(cross))
+        rows = [
+            {
+                "pair_id": pending[column].id,
+                "source_id": source_id,
+                "timestamp": datetime.combine(vectors.dates[day], time.min),
+                "rate": round_rate(float(cross[day, column]))
+            }
+            for day, column in zip(days, columns)
+        ]
+        for i in range(0, len(rows), BATCH_SIZE):
+            upsert_rates(session, rows[i:i + BATCH_SIZE])
+        refresh_rollups(session, rows)
+        for pair in pending:
+            mark_covered(session, CoveredRange, chunk_start, chunk_end, pair_id=pair.id)
+        session.commit()
+        written += len(rows)
+        print(f"[OK] {chunk_start.year}: {len(pending)} пар, {len(rows)} строк")
+    return written
+
+
+def backfill(pairs_spec="all", start=HISTORY_START, end=None, workers=HTTP_MAX_WORKERS):
+    """Загружает историю курсов пар за период в exchange_rates
+
+    Период делится на годы; векторы базовых курсов за годы загружаются
+    параллельно, курсы пар выводятся из них триангуляцией. Готовые годы
+    отмечаются в base_rate_ranges и covered_ranges, поэтому повторный
+    запуск продолжает с места остановки.
+    """
+    end = min(end, last_settled_day()) if end else last_settled_day()
+    started = timer.perf_counter()
+    session = SessionLocal()
+    try:
+        pairs = resolve_pairs(session, pairs_spec)
+        if not pairs or start > end:
+            print("[WARN] Нечего загружать: нет пар или пустой период")
+            return None
+
+        chunks = year_chunks(start, end)
+        print(f"[INFO] Загрузка истории: {len(pairs)} пар, {start}..{end}, {len(chunks)} лет")
+        failed = _fetch_vectors(session, chunks, workers)
+        source = get_or_create_source(session, get_primary_provider())
+        written = _store_pairs(session, pairs, chunks, source.id)
+        if written:
+            rate_cache.invalidate()
+
+        elapsed = timer.perf_counter() - started
+        print(f"[INFO] Загрузка истории завершена за {elapsed:.1f} с: записано строк {written}, "
+              f"ошибок загрузки {failed}")
+        return {"pairs": len(pairs), "years": len(chunks), "rows": written, "failed": failed, "seconds": elapsed}
+    finally:
+        session.close()
@@ -0,0 +1,304 @@
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from app.config import (
+    CACHE_URL, CACHE_MAX_ENTRIES, CACHE_SYNC_INTERVAL, SHARED_CACHE_MAX_ENTRIES,
+    REFERENCE_CACHE_TTL, INFO_CACHE_TTL, RATE_CACHE_TTL
+)
+
+
+class SQLiteBackend:
+    """Общий уровень кэша в файле SQLite — для развёртывания на одной машине"""
+
+    # Раз в сколько записей чистить просроченные и лишние строки
+    PURGE_EVERY = 100
+
+    def __init__(self, path, max_entries=SHARED_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._connection = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        # WAL: читатели из других процессов не ждут записи
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS cache_entries "
+            "(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)"
+        )
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS cache_generations "
+            "(namespace TEXT PRIMARY KEY, generation INTEGER NOT NULL)"
+        )
+
+    def get(self, key):
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value FROM cache_entries WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+                (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, data, ttl=None):
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, data, expires_at)
+            )
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                self._purge()
+
+    def _purge(self):
+        """Удаляет просроченные записи, затем самые старые сверх лимита"""
+        self._connection.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (time.time(),))
+        self._connection.execute(
+            "DELETE FROM cache_entries WHERE rowid IN "
+            "(SELECT rowid FROM cache_entries ORDER BY rowid "
+            "LIMIT max(0, (SELECT count(*) FROM cache_entries) - ?))",
+            (self.max_entries,)
+        )
+
+    def generation(self, namespace):
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT generation FROM cache_generations WHERE namespace = ?", (namespace,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def bump(self, namespace):
+        with self._lock:
+            self._connection.execute(
+                "INSERT INTO cache_generations (namespace, generation) VALUES (?, 1) "
+                "ON CONFLICT(namespace) DO UPDATE SET generation = generation + 1",
+                (namespace,)
+            )
+            # Записи прошлых поколений больше не читаются — освобождаем место сразу
+            self._connection.execute("DELETE FROM cache_entries WHERE key LIKE ?", (f"{namespace}:%",))
+            row = self._connection.execute(
+                "SELECT generation FROM cache_generations WHERE namespace = ?", (namespace,)
+            ).fetchone()
+        return row[0]
+
+
+class RedisBackend:
+    """Общий уровень кэша в Redis (или совместимом сервере) для нескольких машин
+
+    Размер ограничивается политикой вытеснения сервера (maxmemory-policy).
+    """
+
+    KEY_PREFIX = "currency_dashboard:"
+
+    def __init__(self, url):
+        import redis
+
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key):
+        return self._client.get(self.KEY_PREFIX + key)
+
+    def set(self, key, data, ttl=None):
+        self._client.set(self.KEY_PREFIX + key, data, ex=int(ttl) if ttl else None)
+
+    def generation(self, namespace):
+        return int(self._client.get(f"{self.KEY_PREFIX}generation:{namespace}") or 0)
+
+    def bump(self, namespace):
+        return self._client.incr(f"{self.KEY_PREFIX}generation:{namespace}")
+
+
+def open_shared_backend(url):
+    """Общий уровень кэша по URL: redis://…, rediss://… или sqlite:///путь; None — только память процесса"""
+    if not url:
+        return None
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        try:
+            return RedisBackend(url)
+        except ImportError:
+            print("[WARN] Для общего кэша в Redis установите пакет redis, используется только память процесса")
+            return None
+    if url.startswith("sqlite:///"):
+        return SQLiteBackend(url[len("sqlite:///"):])
+    print(f"[WARN] Неизвестный CACHE_URL {url!r}, используется только память процесса")
+    return None
+
+
+_shared_lock = threading.Lock()
+_shared = {}
+
+
+def get_shared_backend():
+    """Общий уровень кэша из CACHE_URL; открывается при первом обращении, а не при импорте"""
+    with _shared_lock:
+        if "backend" not in _shared:
+            _shared["backend"] = open_shared_backend(CACHE_URL)
+        return _shared["backend"]
+
+
+def _is_empty(value):
+    return value is None or (isinstance(value, (list, tuple, dict)) and not value)
+
+
+class Cache:
+    """Потокобезопасный двухуровневый кэш: LRU в памяти процесса и общий уровень из CACHE_URL
+
+    Инвалидация увеличивает поколение пространства имён в общем уровне:
+    записи прошлого поколения перестают читаться во всех процессах, которые
+    сверяют поколение не реже раза в CACHE_SYNC_INTERVAL секунд. Без общего
+    уровня кэш работает как прежде — только в памяти процесса.
+    """
+
+    def __init__(self, namespace, ttl=None, max_size=CACHE_MAX_ENTRIES, shared=True):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_size = max_size
+        self.shared = shared
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._generation = 0
+        self._synced_at = None
+        self._stats = {"hits": 0, "shared_hits": 0, "misses": 0}
+
+    def _backend(self):
+        return get_shared_backend() if self.shared else None
+
+    def _shared_key(self, key, generation):
+        return f"{self.namespace}:{generation}:{key!r}"
+
+    def _sync(self, backend):
+        """Текущее поколение; при его смене локальные записи сбрасываются"""
+        if backend is None:
+            return self._generation
+        now = time.monotonic()
+        if self._synced_at is not None and now - self._synced_at < CACHE_SYNC_INTERVAL:
+            return self._generation
+        try:
+            generation = backend.generation(self.namespace)
+        except Exception as e:
+            print(f"[WARN] Общий кэш недоступен: {e}")
+            return self._generation
+        with self._lock:
+            if generation != self._generation:
+                self._entries.clear()
+                self._generation = generation
+            self._synced_at = now
+        return generation
+
+    def _store_local(self, key, value, ttl, generation):
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            # Значение, прочитанное до инвалидации, в новое поколение не попадает
+            if generation != self._generation:
+                return
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while self.max_size and len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def get(self, key, default=None):
+        backend = self._backend()
+        generation = self._sync(backend)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return value
+                del self._entries[key]
+
+        if backend is not None:
+            try:
+                data = backend.get(self._shared_key(key, generation))
+            except Exception as e:
+                print(f"[WARN] Общий кэш недоступен: {e}")
+                data = None
+            if data is not None:
+                value, ttl = pickle.loads(data)
+                self._store_local(key, value, ttl, generation)
+                with self._lock:
+                    self._stats["shared_hits"] += 1
+                return value
+
+        with self._lock:
+            self._stats["misses"] += 1
+        return default
+
+    def set(self, key, value, ttl=None, generation=None):
+        ttl = self.ttl if ttl is None else ttl
+        backend = self._backend()
+        if generation is None:
+            generation = self._sync(backend)
+        self._store_local(key, value, ttl, generation)
+        if backend is not None:
+            try:
+                backend.set(self._shared_key(key, generation), pickle.dumps((value, ttl)), ttl)
+            except Exception as e:
+                print(f"[WARN] Общий кэш недоступен: {e}")
+
+    def get_or_load(self, key, loader, ttl=None, complete_flag=False):
+        """Возвращает значение из кэша, при промахе вызывает loader() и запоминает результат
+
+        None и пустые результаты не запоминаются: они бывают следствием сбоя загрузки.
+        С complete_flag=True loader() возвращает (значение, полное ли оно) —
+        неполное значение возвращается, но тоже не запоминается.
+        """
+        missing = object()
+        # Поколение фиксируется до загрузки: инвалидация во время loader() отбросит результат
+        generation = self._sync(self._backend())
+        value = self.get(key, missing)
+        if value is missing or value is None:
+            value, complete = loader() if complete_flag else (loader(), True)
+            if complete and not _is_empty(value):
+                self.set(key, value, ttl=ttl, generation=generation)
+        return value
+
+    def invalidate(self, key=None):
+        """Удаляет один ключ или весь кэш
+
+        С общим уровнем сбрасывается всё пространство имён во всех процессах.
+        """
+        backend = self._backend()
+        if backend is not None:
+            try:
+                generation = backend.bump(self.namespace)
+            except Exception as e:
+                print(f"[WARN] Общий кэш недоступен, сброшен только кэш процесса: {e}")
+            else:
+                with self._lock:
+                    self._entries.clear()
+                    self._generation = generation
+                    self._synced_at = time.monotonic()
+                return
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def get_stats(self):
+        """Счётчики попаданий в память процесса, в общий уровень и промахов"""
+        with self._lock:
+            return {**self._stats, "size": len(self._entries)}
+
+
+# Справочники валют и пар: сбрасываются при добавлении пары и заполнении валют,
+# TTL подстраховывает процессы, которые о сбросе не узнали (нет общего уровня)
+reference_cache = Cache("reference", ttl=REFERENCE_CACHE_TTL)
+
+# Снимок справочника валют и курсов к EUR для /info, обновляется планировщиком
+info_cache = Cache("info", ttl=INFO_CACHE_TTL)
+
+# Истории курсов, готовые графики и последние курсы пар;
+# сбрасывается сборщиком и загрузкой истории после записи новых курсов
+rate_cache = Cache("rates", ttl=RATE_CACHE_TTL)
+
+# Последние замеры источников курсов: пишет сборщик, читает /health веб-процессов
+provider_cache = Cache("providers")
+
+
+def get_all_cache_stats():
+    """Статистика всех кэшей приложения для /health"""
+    return {cache.namespace: cache.get_stats() for cache in (reference_cache, info_cache, rate_cache)}
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+from app.db import SessionLocal
+from app.db.models import CurrencyPair
+from app.history import iter_rate_chunks
+
+
+def pair_label(pair):
+    return f"{pair.base_currency} → {pair.target_currency}"
+
+
+def get_rate_matrix(pair_ids, start, end):
+    """Курсы нескольких пар за период одной таблицей: строки — даты, столбцы — пары
+
+    Все пары читаются одним запросом к exchange_rates и разворачиваются в pandas;
+    из API докачиваются только недостающие интервалы.
+    """
+    session = SessionLocal()
+    try:
+        pairs = (
+            session.query(CurrencyPair)
+            .filter(CurrencyPair.id.in_([int(pair_id) for pair_id in pair_ids]))
+            .order_by(CurrencyPair.id)
+            .all()
+        )
+        session.expunge_all()
+    finally:
+        session.close()
+    if not pairs:
+        return pd.DataFrame()
+
+    rows = [row for chunk in iter_rate_chunks(pairs, start, end) for row in chunk]
+    if not rows:
+        return pd.DataFrame()
+
+    frame = pd.DataFrame.from_records(rows, columns=["pair_id", "date", "rate"])
+    frame["rate"] = frame["rate"].astype(float)
+    matrix = frame.pivot(index="date", columns="pair_id", values="rate").sort_index()
+    matrix.columns.name = None
+    labels = {pair.id: pair_label(pair) for pair in pairs}
+    return matrix.rename(columns=labels)[[labels[pair.id] for pair in pairs if pair.id in matrix.columns]]
+
+
+def rebase(matrix, base=100.0):
+    """Приводит каждый ряд к base на первую дату, где у пары есть курс"""
+    values = matrix.to_numpy()
+    # Индекс первой непустой строки в каждом столбце
+    first = np.argmax(~np.isnan(values), axis=0)
+    start_values = values[first, np.arange(values.shape[1])]
+    return pd.DataFrame(values / start_values * base, index=matrix.index, columns=matrix.columns)
+
+
+def correlation(matrix):
+    """Корреляция дневных логарифмических доходностей пар"""
+    # Разные пары могут иметь пропуски в разные дни — доходность считается по соседним известным курсам
+    returns = np.log(matrix.ffill()).diff().iloc[1:]
+    return returns.corr()
@@ -11,5 +11,62 @@ MYSQL_USER = os.getenv("MYSQL_USER", "appuser")
 MYSQL_PASSWORD = os.getenv("MYSQL_PASSWORD", "apppassword")
 MYSQL_DATABASE = os.getenv("MYSQL_DATABASE", "currency_data")
 
-# Строка подключения к БД
-SQLALCHEMY_DATABASE_URL = f"mysql+pymysql://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}:{MYSQL_PORT}/{MYSQL_DATABASE}"
+# Строка подключения к БД: по умолчанию MySQL из настроек выше.
+# sqlite:///currency.db — локальная БД без сервера, duckdb:///currency.duckdb — колоночная БД
+# для аналитики истории курсов (один процесс, нужен пакет duckdb_engine)
+DATABASE_URL = os.getenv("DATABASE_URL", "")
+SQLALCHEMY_DATABASE_URL = DATABASE_URL or f"mysql+pymysql://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}:{MYSQL_PORT}/{MYSQL_DATABASE}"
+
+# Настройки HTTP-клиента для внешних API курсов
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3.05"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "10"))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "3"))
+HTTP_BACKOFF = float(os.getenv("HTTP_BACKOFF", "0.5"))
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+HTTP_MAX_WORKERS = int(os.getenv("HTTP_MAX_WORKERS", "8"))
+# Сколько ответов API хранить в кэше для условных запросов (ETag / Last-Modified)
+HTTP_CACHE_SIZE = int(os.getenv("HTTP_CACHE_SIZE", "256"))
+
+# Источники курсов: frankfurter — Frankfurter API, file — локальный JSON (RATE_FIXTURE_PATH)
+RATE_PROVIDERS = [p.strip() for p in os.getenv("RATE_PROVIDERS", "frankfurter").split(",") if p.strip()]
+RATE_FIXTURE_PATH = os.getenv("RATE_FIXTURE_PATH", "")
+# Сколько секунд цикл сбора ждёт ответов источников, прежде чем выбрать из пришедших
+PROVIDER_WAIT_SECONDS = float(os.getenv("PROVIDER_WAIT_SECONDS", "5"))
+# Сколько секунд не опрашивать источник после ошибки, если есть другие источники
+PROVIDER_COOLDOWN_SECONDS = int(os.getenv("PROVIDER_COOLDOWN_SECONDS", "300"))
+
+# Время жизни кэша справочников валют и пар, секунд
+REFERENCE_CACHE_TTL = int(os.getenv("REFERENCE_CACHE_TTL", "300"))
+# Время жизни снимка для страницы /info в памяти и период его обновления планировщиком, секунд
+INFO_CACHE_TTL = int(os.getenv("INFO_CACHE_TTL", "600"))
+INFO_REFRESH_INTERVAL = int(os.getenv("INFO_REFRESH_INTERVAL", "3600"))
+
+# Аренда роли сборщика курсов: срок в секундах и период продления
+COLLECTOR_LEASE_TTL = int(os.getenv("COLLECTOR_LEASE_TTL", "90"))
+COLLECTOR_LEASE_RENEW = int(os.getenv("COLLECTOR_LEASE_RENEW", "30"))
+
+# Период опроса последнего курса в live-режиме, секунд, и число точек на live-графике
+LIVE_POLL_INTERVAL = int(os.getenv("LIVE_POLL_INTERVAL", "15"))
+LIVE_POINTS = int(os.getenv("LIVE_POINTS", "30"))
+
+# Режим планировщика: adaptive — сбор по календарю публикаций ЕЦБ, interval — каждую минуту
+SCHEDULER_MODE = os.getenv("SCHEDULER_MODE", "adaptive")
+# Период опроса в окне публикации, пока новые курсы не появились: обычный и при открытых live-страницах, секунд
+SCHEDULER_POLL_SECONDS = int(os.getenv("SCHEDULER_POLL_SECONDS", "120"))
+SCHEDULER_FAST_POLL_SECONDS = int(os.getenv("SCHEDULER_FAST_POLL_SECONDS", "30"))
+# Период повтора после ошибки или если курсы опаздывают после окна публикации, секунд
+SCHEDULER_RETRY_SECONDS = int(os.getenv("SCHEDULER_RETRY_SECONDS", "300"))
+# Период опроса, пока у какой-либо пары нет последнего курса (например, пара только что добавлена), секунд
+SCHEDULER_NEW_PAIR_SECONDS = int(os.getenv("SCHEDULER_NEW_PAIR_SECONDS", "60"))
+# Сколько секунд пара считается просматриваемой после последнего обращения к её live-режиму
+PAIR_VIEW_TTL = int(os.getenv("PAIR_VIEW_TTL", "600"))
+
+# Общий уровень кэша для всех процессов: redis://host:6379/0 или sqlite:///путь/cache.db; пусто — только память процесса
+CACHE_URL = os.getenv("CACHE_URL", "")
+# Сколько записей держит каждый кэш в памяти процесса и общий кэш в SQLite
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "512"))
+SHARED_CACHE_MAX_ENTRIES = int(os.getenv("SHARED_CACHE_MAX_ENTRIES", "10000"))
+# Как часто процесс сверяет поколение кэша с общим уровнем, секунд
+CACHE_SYNC_INTERVAL = float(os.getenv("CACHE_SYNC_INTERVAL", "1"))
+# Время жизни историй курсов и готовых графиков в кэше, секунд
+RATE_CACHE_TTL = int(os.getenv("RATE_CACHE_TTL", "600"))
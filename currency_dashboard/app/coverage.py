@@ -0,0 +1,56 @@
+from datetime import date, timedelta
+
+
+def last_settled_day():
+    """Последний день, который можно отмечать загруженным: курс за сегодня
+    может быть ещё не опубликован — его приносит планировщик"""
+    return date.today() - timedelta(days=1)
+
+
+def missing_ranges(covered, start, end):
+    """Возвращает части [start, end], не входящие в отсортированный список интервалов covered"""
+    gaps = []
+    cursor = start
+    for covered_start, covered_end in covered:
+        if covered_end < cursor:
+            continue
+        if covered_start > end:
+            break
+        if covered_start > cursor:
+            gaps.append((cursor, covered_start - timedelta(days=1)))
+        cursor = covered_end + timedelta(days=1)
+        if cursor > end:
+            return gaps
+    if cursor <= end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+def covered_intervals(session, model, **key):
+    """Загруженные интервалы [(start_date, end_date)] из таблицы покрытия model, по возрастанию"""
+    return [
+        (covered.start_date, covered.end_date)
+        for covered in session.query(model).filter_by(**key).order_by(model.start_date)
+    ]
+
+
+def mark_covered(session, model, start, end, **key):
+    """Добавляет интервал в покрытие, объединяя его с пересекающимися и смежными
+
+    model — таблица покрытия с колонками start_date и end_date,
+    key — колонки, выделяющие ряд (например, pair_id).
+    """
+    neighbours = (
+        session.query(model)
+        .filter_by(**key)
+        .filter(
+            model.start_date <= end + timedelta(days=1),
+            model.end_date >= start - timedelta(days=1)
+        )
+        .all()
+    )
+    for covered in neighbours:
+        start = min(start, covered.start_date)
+        end = max(end, covered.end_date)
+        session.delete(covered)
+    session.add(model(start_date=start, end_date=end, **key))
@@ -1,160 +1,317 @@
-from dash import Input, Output, State, html, dcc
+from dash import Input, Output, State, ClientsideFunction
 import plotly.graph_objects as go
-import requests
-import pandas as pd
 from app.db import SessionLocal
-from app.db.models import ExchangeRate, CurrencyPair
-from datetime import datetime
+from sqlalchemy import func
+from app.config import LIVE_POINTS, LIVE_POLL_INTERVAL
+from app.db.models import ExchangeRate, CurrencyPair, LatestRate
+from datetime import date
+import math
+from app.cache import rate_cache, reference_cache
 from app.dashboard.layout import get_currency_pair_options
-import dash_bootstrap_components as dbc
+from app.dashboard.downsample import downsample_series, WEBGL_THRESHOLD, MARKERS_THRESHOLD
+from app.dashboard.theme import PRIMARY_TRACE, apply_figure_theme, empty_figure
+from app.dashboard.table_query import parse_filter_query, parse_sort_by
+from app.history import get_rate_history, get_rate_page, get_rate_rollup
+from app.rollups import choose_period
+from app.views import record_pair_view
 import dash
 
 
+# Ширина графика, если браузер ещё не сообщил реальную
+DEFAULT_GRAPH_WIDTH = 1200
+# Шаг округления ширины для кэша графиков: близкие размеры окна делят одну запись
+FIGURE_WIDTH_STEP = 200
+
+
+def parse_zoom(relayout):
+    """Видимый интервал дат из relayoutData графика
+
+    Возвращает (start, end), "autorange" при сбросе масштаба или None,
+    если событие не меняет ось X.
+    """
+    if not relayout:
+        return None
+    if relayout.get("xaxis.autorange"):
+        return "autorange"
+    if "xaxis.range[0]" in relayout and "xaxis.range[1]" in relayout:
+        bounds = relayout["xaxis.range[0]"], relayout["xaxis.range[1]"]
+    elif "xaxis.range" in relayout:
+        bounds = relayout["xaxis.range"]
+    else:
+        return None
+    try:
+        return date.fromisoformat(str(bounds[0])[:10]), date.fromisoformat(str(bounds[1])[:10])
+    except ValueError:
+        return None
+
+
+PERIOD_TITLES = {"week": "по неделям", "month": "по месяцам"}
+
+
+def _rollup_figure(rollup, chart_type, title):
+    """График по агрегатам: свечи OHLC или линия средних курсов периода"""
+    dates = [row[0].isoformat() for row in rollup]
+    fig = go.Figure()
+    if chart_type == "candles":
+        fig.add_trace(go.Candlestick(
+            x=dates,
+            open=[row[1] for row in rollup],
+            high=[row[2] for row in rollup],
+            low=[row[3] for row in rollup],
+            close=[row[4] for row in rollup]
+        ))
+        fig.update_layout(xaxis_rangeslider_visible=False)
+    else:
+        fig.add_trace(go.Scatter(
+            x=dates,
+            y=[row[5] for row in rollup],
+            mode="lines+markers" if len(dates) <= MARKERS_THRESHOLD else "lines",
+            meta=PRIMARY_TRACE,
+            line=dict(width=2),
+            marker=dict(size=8)
+        ))
+    fig.update_layout(
+        title=title,
+        xaxis_title="Дата",
+        yaxis_title="Курс"
+    )
+    return fig
+
+
+def _figure_data(fig):
+    """Словарь графика для кэша без шаблона plotly: его всё равно заменяет тема"""
+    data = fig.to_dict()
+    data["layout"].pop("template", None)
+    return data
+
+
+def _history_figure(pair, view_start, view_end, period, chart_type, width):
+    """График пары за период без темы в виде словаря для кэша (None, если данных нет)
+    и признак, загружена ли история за период полностью
+    """
+    title = f"{pair.base_currency} → {pair.target_currency}"
+    if period != "day":
+        rollup, complete = get_rate_rollup(pair, view_start, view_end, period)
+        if not rollup:
+            return None, complete
+        return _figure_data(_rollup_figure(rollup, chart_type, f"{title}, {PERIOD_TITLES[period]}")), complete
+
+    # История читается из БД, из API докачиваются только недостающие интервалы
+    history, complete = get_rate_history(pair, view_start, view_end)
+    if not history:
+        return None, complete
+
+    # Прореживаем ряд до ширины графика: больше точек на экране не различить
+    dates, rates = downsample_series(
+        [day for day, _ in history],
+        [rate for _, rate in history],
+        width
+    )
+    dates = [day.isoformat() for day in dates]
+
+    # Длинные ряды рисуются через WebGL и без маркеров
+    scatter = go.Scattergl if len(history) > WEBGL_THRESHOLD else go.Scatter
+    markers = len(dates) <= MARKERS_THRESHOLD
+
+    fig = go.Figure()
+    fig.add_trace(scatter(
+        x=dates,
+        y=rates,
+        mode="lines+markers" if markers else "lines",
+        meta=PRIMARY_TRACE,
+        line=dict(width=2),
+        marker=dict(size=8)
+    ))
+    fig.update_layout(
+        title=title,
+        xaxis_title="Дата",
+        yaxis_title="Курс"
+    )
+    return _figure_data(fig), complete
+
+
+def _rate_page(pair, start, end, **query):
+    """Страница таблицы курсов (строки, всего строк) и признак, можно ли её кэшировать"""
+    rows, total, complete = get_rate_page(pair, start, end, **query)
+    # Пустая страница тоже может быть следствием сбоя загрузки истории
+    return (rows, total), complete and bool(rows)
+
+
+def _recent_rates(pair_id):
+    """Последние дневные курсы пары [(timestamp, rate)] — по индексу (pair_id, timestamp)"""
+    session = SessionLocal()
+    try:
+        recent = (
+            session.query(ExchangeRate.timestamp, func.avg(ExchangeRate.rate))
+            .filter(ExchangeRate.pair_id == pair_id)
+            .group_by(ExchangeRate.timestamp)
+            .order_by(ExchangeRate.timestamp.desc())
+            .limit(LIVE_POINTS)
+            .all()
+        )
+        return [(timestamp, float(rate)) for timestamp, rate in reversed(recent)]
+    finally:
+        session.close()
+
+
+def _latest_rate(pair_id):
+    """Последний курс пары (timestamp, rate) из latest_rates или None"""
+    session = SessionLocal()
+    try:
+        latest = session.get(LatestRate, pair_id)
+        return (latest.timestamp, latest.rate) if latest else None
+    finally:
+        session.close()
+
+
 def register_callbacks(app):
     @app.callback(
         Output("exchange-rate-graph", "figure"),
-        Output("rate-table", "data"),
         Input("pair-dropdown", "value"),
         Input("date-range", "start_date"),
         Input("date-range", "end_date"),
         Input("mode-toggle", "value"),
-        Input("theme-toggle", "value")
+        Input("chart-type", "value"),
+        # Масштабирование графика запрашивает детализацию видимого участка
+        Input("exchange-rate-graph", "relayoutData"),
+        State("graph-width", "data"),
+        # Тема только читается: её переключение перекрашивает график на клиенте
+        State("theme-toggle", "value")
     )
-    def update_graph_and_table(pair_id, start_date, end_date, mode, theme):
+    def update_graph(pair_id, start_date, end_date, mode, chart_type, relayout, graph_width, theme):
+        zoom = None
+        if dash.ctx.triggered_id == "exchange-rate-graph":
+            zoom = parse_zoom(relayout)
+            if zoom is None:
+                # Событие relayout без изменения оси X (autosize, перекраска темы)
+                raise dash.exceptions.PreventUpdate
+
         if mode != "history" or not pair_id:
             # Возвращаем пустой график с правильной темой
-            empty_fig = go.Figure()
-            if theme == "dark":
-                empty_fig.update_layout(
-                    template="plotly_dark",
-                    plot_bgcolor="#1E1E1E",
-                    paper_bgcolor="#121212",
-                    font=dict(color="#E0E0E0")
-                )
-            return empty_fig, []
+            return empty_figure(theme)
 
         session = SessionLocal()
         try:
             pair = session.query(CurrencyPair).filter_by(id=int(pair_id)).first()
             if not pair:
-                # Пустой график с правильной темой
-                empty_fig = go.Figure()
-                if theme == "dark":
-                    empty_fig.update_layout(
-                        title="Пара не найдена",
-                        template="plotly_dark",
-                        plot_bgcolor="#1E1E1E",
-                        paper_bgcolor="#121212",
-                        font=dict(color="#E0E0E0")
-                    )
-                else:
-                    empty_fig.update_layout(title="Пара не найдена")
-                return empty_fig, []
-            base = pair.base_currency
-            target = pair.target_currency
+                return empty_figure(theme, "Пара не найдена")
         finally:
             session.close()
 
         if not start_date or not end_date:
-            # Пустой график с правильной темой
-            empty_fig = go.Figure()
-            if theme == "dark":
-                empty_fig.update_layout(
-                    title="Выберите диапазон дат",
-                    template="plotly_dark",
-                    plot_bgcolor="#1E1E1E",
-                    paper_bgcolor="#121212",
-                    font=dict(color="#E0E0E0")
-                )
-            else:
-                empty_fig.update_layout(title="Выберите диапазон дат")
-            return empty_fig, []
-
-        url = f"https://api.frankfurter.app/{start_date}..{end_date}?from={base}&to={target}"
+            return empty_figure(theme, "Выберите диапазон дат")
+
+        start = date.fromisoformat(start_date[:10])
+        end = date.fromisoformat(end_date[:10])
+        # При увеличении читаем только видимый участок выбранного периода
+        view_start, view_end = start, end
+        if zoom and zoom != "autorange":
+            view_start, view_end = max(start, zoom[0]), min(end, zoom[1])
+            if view_start > view_end:
+                raise dash.exceptions.PreventUpdate
+
+        # Длинные периоды читаются из недельных и месячных агрегатов
+        period = choose_period(view_start, view_end)
+        # Дневной график зависит от ширины, агрегатный — от типа графика
+        width = graph_width or DEFAULT_GRAPH_WIDTH
+        width = -(-int(width) // FIGURE_WIDTH_STEP) * FIGURE_WIDTH_STEP
+        variant = width if period == "day" else chart_type
+        try:
+            # Готовый график без темы общий для всех клиентов и процессов;
+            # график по неполной истории не кэшируется, чтобы сбой API не раздавался всем
+            figure = rate_cache.get_or_load(
+                ("figure", pair.id, view_start, view_end, period, variant),
+                lambda: _history_figure(pair, view_start, view_end, period, chart_type, width),
+                complete_flag=True
+            )
+        except Exception as e:
+            return empty_figure(theme, f"Ошибка API: {e}")
+        if figure is None:
+            return empty_figure(theme, "Нет данных за выбранный период")
+
+        fig = go.Figure(figure)
+        # Сохраняет масштаб графика при перекраске под другую тему и догрузке деталей
+        fig.update_layout(uirevision=f"{pair_id}:{start}:{end}")
+        return apply_figure_theme(fig, theme)
+
+    # Ширина графика в пикселях определяет, до скольких точек прореживать ряд
+    app.clientside_callback(
+        ClientsideFunction(namespace="graph", function_name="width"),
+        Output("graph-width", "data"),
+        Input("exchange-rate-graph", "id")
+    )
+
+    @app.callback(
+        Output("rate-table", "data"),
+        Output("rate-table", "page_count"),
+        Output("rate-table", "page_current"),
+        Input("pair-dropdown", "value"),
+        Input("date-range", "start_date"),
+        Input("date-range", "end_date"),
+        Input("mode-toggle", "value"),
+        Input("rate-table", "page_current"),
+        Input("rate-table", "page_size"),
+        Input("rate-table", "sort_by"),
+        Input("rate-table", "filter_query")
+    )
+    def update_rate_table(pair_id, start_date, end_date, mode, page_current, page_size, sort_by, filter_query):
+        # Пагинация, сортировка и фильтрация выполняются в SQL: в браузер уходит только видимая страница
+        if mode != "history" or not pair_id or not start_date or not end_date:
+            return [], 1, 0
+
+        session = SessionLocal()
         try:
-            response = requests.get(url)
-            data = response.json()
-
-            if "rates" not in data:
-                # Пустой график с правильной темой
-                empty_fig = go.Figure()
-                if theme == "dark":
-                    empty_fig.update_layout(
-                        title="Нет данных от API",
-                        template="plotly_dark",
-                        plot_bgcolor="#1E1E1E",
-                        paper_bgcolor="#121212",
-                        font=dict(color="#E0E0E0")
-                    )
-                else:
-                    empty_fig.update_layout(title="Нет данных от API")
-                return empty_fig, []
-
-            rates_dict = data["rates"]
-            dates = sorted(rates_dict.keys())
-            rates = [rates_dict[d][target] for d in dates]
-
-            fig = go.Figure()
-            
-            # Улучшенный стиль графика в зависимости от темы
-            if theme == "dark":
-                line_color = "#8AB4F8"  # Голубой для темной темы
-                marker_color = "#4285F4"  # Google синий
-                fig.add_trace(go.Scatter(
-                    x=dates, 
-                    y=rates, 
-                    mode="lines+markers",
-                    line=dict(color=line_color, width=2),
-                    marker=dict(color=marker_color, size=8)
-                ))
-                fig.update_layout(
-                    title=f"{base} → {target}",
-                    xaxis_title="Дата",
-                    yaxis_title="Курс",
-                    template="plotly_dark",
-                    plot_bgcolor="#1E1E1E",
-                    paper_bgcolor="#121212",
-                    font=dict(color="#E0E0E0")
-                )
-            else:
-                # Светлая тема
-                line_color = "#1A73E8"  # Google синий для светлой темы
-                marker_color = "#0F4BAA"  # Темный синий
-                fig.add_trace(go.Scatter(
-                    x=dates, 
-                    y=rates, 
-                    mode="lines+markers",
-                    line=dict(color=line_color, width=2),
-                    marker=dict(color=marker_color, size=8)
-                ))
-                fig.update_layout(
-                    title=f"{base} → {target}",
-                    xaxis_title="Дата",
-                    yaxis_title="Курс",
-                    template="plotly_white"
-                )
-
-            table_data = [
-                {"pair": f"{base} → {target}", "date": d, "rate": rates_dict[d][target]}
-                for d in dates
-            ]
-
-            return fig, table_data
+            pair = session.query(CurrencyPair).filter_by(id=int(pair_id)).first()
+        finally:
+            session.close()
+        if not pair:
+            return [], 1, 0
 
+        # Новая пара, период, сортировка или фильтр — показываем с первой страницы
+        triggered = dash.ctx.triggered_prop_ids
+        page_reset = dash.ctx.triggered_id not in (None, "rate-table") or any(
+            prop in triggered for prop in ("rate-table.sort_by", "rate-table.filter_query")
+        )
+        if page_reset:
+            page_current = 0
+        sort_column, descending = parse_sort_by(sort_by)
+        page_size = page_size or 10
+        page_current = page_current or 0
+        start = date.fromisoformat(start_date[:10])
+        end = date.fromisoformat(end_date[:10])
+        conditions = tuple(parse_filter_query(filter_query))
+        try:
+            rows, total = rate_cache.get_or_load(
+                ("page", pair.id, start, end, page_current, page_size, sort_column, descending, conditions),
+                lambda: _rate_page(
+                    pair,
+                    start,
+                    end,
+                    offset=page_current * page_size,
+                    limit=page_size,
+                    sort_column=sort_column,
+                    descending=descending,
+                    conditions=conditions
+                ),
+                complete_flag=True
+            )
         except Exception as e:
-            # Пустой график с правильной темой
-            empty_fig = go.Figure()
-            if theme == "dark":
-                empty_fig.update_layout(
-                    title=f"Ошибка API: {e}",
-                    template="plotly_dark",
-                    plot_bgcolor="#1E1E1E",
-                    paper_bgcolor="#121212",
-                    font=dict(color="#E0E0E0")
-                )
-            else:
-                empty_fig.update_layout(title=f"Ошибка API: {e}")
-            return empty_fig, []
+            print("Ошибка загрузки таблицы курсов:", str(e))
+            return [], 1, 0
+
+        label = f"{pair.base_currency} → {pair.target_currency}"
+        data = [{"pair": label, "date": day.isoformat(), "rate": rate} for day, rate in rows]
+        return data, max(1, math.ceil(total / page_size)), 0 if page_reset else dash.no_update
+
+    # Переключение темы перекрашивает уже построенный график в браузере
+    app.clientside_callback(
+        ClientsideFunction(namespace="theme", function_name="applyFigureTheme"),
+        Output("exchange-rate-graph", "figure", allow_duplicate=True),
+        Input("theme-toggle", "value"),
+        State("exchange-rate-graph", "figure"),
+        State("theme-config", "data"),
+        prevent_initial_call=True
+    )
 
     @app.callback(
         Output("add-pair-msg", "children"),
@@ -165,223 +322,224 @@ def register_callbacks(app):
         prevent_initial_call=True
     )
     def add_currency_pair(n_clicks, base, target):
+        # Список пар меняется только при успешном добавлении
         if not base or not target:
-            return "Выберите обе валюты", get_currency_pair_options()
+            return "Выберите обе валюты", dash.no_update
 
         if base == target:
-            return "Валюты не должны совпадать", get_currency_pair_options()
+            return "Валюты не должны совпадать", dash.no_update
 
         session = SessionLocal()
         try:
             exists = (
-                session.query(CurrencyPair)
+                session.query(CurrencyPair.id)
                 .filter_by(base_currency=base, target_currency=target)
                 .first()
             )
             if exists:
-                return "Пара уже существует", get_currency_pair_options()
+                return "Пара уже существует", dash.no_update
 
             pair = CurrencyPair(base_currency=base, target_currency=target)
             session.add(pair)
             session.commit()
+            reference_cache.invalidate("currency_pair_options")
             return "Пара добавлена!", get_currency_pair_options()
 
         except Exception as e:
             session.rollback()
-            return f"Ошибка: {str(e)}", get_currency_pair_options()
+            return f"Ошибка: {str(e)}", dash.no_update
 
         finally:
             session.close()
 
     @app.callback(
         Output("history-container", "style"),
-        Output("live-container", "children"),
+        Output("live-container", "style"),
+        Output("live-interval", "disabled"),
+        Output("live-date", "children"),
+        Output("live-rate", "children"),
+        Output("live-graph", "figure"),
+        Output("live-version", "data"),
         Input("mode-toggle", "value"),
         Input("pair-dropdown", "value"),
-        Input("theme-toggle", "value")
+        State("theme-toggle", "value")
     )
     def toggle_mode_display(mode, pair_id, theme):
         if mode == "history":
-            return {"display": "block"}, ""
+            return {"display": "block"}, {"display": "none"}, True, "", "", empty_figure(theme), None
 
+        hidden = {"display": "none"}
         if not pair_id:
-            return {"display": "none"}, html.P("Выберите валютную пару.")
+            return hidden, {"display": "block"}, True, "Выберите валютную пару.", "", empty_figure(theme), None
 
-        session = SessionLocal()
-        try:
-            rate = (
-                session.query(ExchangeRate)
-                .filter_by(pair_id=int(pair_id))
-                .order_by(ExchangeRate.timestamp.desc())
-                .first()
-            )
-            if not rate:
-                return {"display": "none"}, html.P("Нет данных для выбранной пары.")
-
-            card_style = {}
-            if theme == "dark":
-                card_style = {
-                    "backgroundColor": "#1F1F1F", 
-                    "borderColor": "#333", 
-                    "color": "white",
-                    "padding": "20px",
-                    "borderRadius": "8px",
-                    "boxShadow": "0 4px 8px 0 rgba(0,0,0,0.3)"
-                }
-
-            return {"display": "none"}, html.Div([
-                dbc.Card([
-                    dbc.CardHeader(html.H3("Текущий курс", className="mb-0")),
-                    dbc.CardBody([
-                        html.P(f"Дата: {rate.timestamp.strftime('%Y-%m-%d %H:%M:%S')}"),
-                        html.H4(f"Курс: {rate.rate}", 
-                                style={"color": "#8AB4F8" if theme == "dark" else "#1A73E8"})
-                    ])
-                ], style=card_style if theme == "dark" else {})
-            ])
-        finally:
-            session.close()
+        # Live-данные живут в кэше не дольше периода опроса: без общего уровня
+        # сброс от сборщика до веб-процесса не доходит
+        recent = rate_cache.get_or_load(("recent", int(pair_id)), lambda: _recent_rates(int(pair_id)),
+                                        ttl=LIVE_POLL_INTERVAL)
+        if not recent:
+            return hidden, {"display": "block"}, True, "Нет данных для выбранной пары.", "", empty_figure(theme), None
+        record_pair_view(pair_id)
+
+        dates = [timestamp.isoformat() for timestamp, _ in recent]
+        rates = [rate for _, rate in recent]
+        fig = go.Figure(go.Scatter(
+            x=dates,
+            y=rates,
+            mode="lines+markers",
+            meta=PRIMARY_TRACE,
+            line=dict(width=2),
+            marker=dict(size=6)
+        ))
+        fig.update_layout(margin=dict(l=40, r=20, t=20, b=30))
+        last_timestamp = recent[-1][0]
+        version = {"pair_id": pair_id, "timestamp": dates[-1], "rate": rates[-1], "points": len(dates)}
+        return (
+            hidden,
+            {"display": "block"},
+            False,
+            f"Дата: {last_timestamp.strftime('%Y-%m-%d %H:%M:%S')}",
+            f"Курс: {rates[-1]}",
+            apply_figure_theme(fig, theme),
+            version
+        )
 
     @app.callback(
-        Output("download-data", "data"),
-        Input("download-btn", "n_clicks"),
-        State("rate-table", "data"),
-        State("export-format", "value"),
+        Output("live-date", "children", allow_duplicate=True),
+        Output("live-rate", "children", allow_duplicate=True),
+        Output("live-graph", "figure", allow_duplicate=True),
+        Output("live-version", "data", allow_duplicate=True),
+        Input("live-interval", "n_intervals"),
+        State("live-version", "data"),
         prevent_initial_call=True
     )
-    def export_table(n_clicks, table_data, file_format):
-        if not table_data:
-            return None
+    def update_live(n_intervals, version):
+        # Опрос: курс читается по первичному ключу из latest_rates, который обновляет сборщик;
+        # клиенты, открывшие одну пару, делят одно чтение через кэш
+        if not version:
+            raise dash.exceptions.PreventUpdate
+        pair_id = int(version["pair_id"])
+        record_pair_view(pair_id)
+        latest = rate_cache.get_or_load(("latest", pair_id), lambda: _latest_rate(pair_id), ttl=LIVE_POLL_INTERVAL)
+        if not latest:
+            raise dash.exceptions.PreventUpdate
 
-        df = pd.DataFrame(table_data)
+        latest_timestamp, latest_rate = latest
+        timestamp = latest_timestamp.isoformat()
+        if timestamp == version["timestamp"] and latest_rate == version["rate"]:
+            # Курс не изменился с прошлой версии клиента — ответ без данных
+            raise dash.exceptions.PreventUpdate
 
-        if file_format == "csv":
-            return dcc.send_data_frame(df.to_csv, filename="exchange_rates.csv", index=False)
+        # В браузер уходят только изменения: новая точка или исправленный курс последней
+        patch = dash.Patch()
+        points = version["points"]
+        if timestamp == version["timestamp"]:
+            patch["data"][0]["y"][points - 1] = latest_rate
         else:
-            return dcc.send_data_frame(df.to_excel, filename="exchange_rates.xlsx", index=False)
+            patch["data"][0]["x"].append(timestamp)
+            patch["data"][0]["y"].append(latest_rate)
+            points += 1
+        return (
+            f"Дата: {latest_timestamp.strftime('%Y-%m-%d %H:%M:%S')}",
+            f"Курс: {latest_rate}",
+            patch,
+            {**version, "timestamp": timestamp, "rate": latest_rate, "points": points}
+        )
 
-    @app.callback(
-    Output("main-container", "style"),
-    Output("main-container", "className"),
-    Input("theme-toggle", "value"),
-    Input("url", "pathname")
-    )
-    def update_theme_styles(theme, pathname):
-        if theme == "dark":
-            return (
-                # Main container style
-                {
-                    "backgroundColor": "#121212",
-                    "color": "white",
-                    "minHeight": "100vh",
-                    "padding": "15px",
-                    "transition": "all 0.3s ease"
-                },
-                # Class name for dark theme
-                "dark-theme"
-            )
-        else:
-            return (
-                # Main container style
-                {
-                    "backgroundColor": "white",
-                    "color": "black",
-                    "minHeight": "100vh",
-                    "padding": "15px",
-                    "transition": "all 0.3s ease"
-                },
-                # Class name for light theme
-                ""
-            )
-            
-    # Отдельный callback для стилей таблицы, который выполняется только на главной странице
-    @app.callback(
-        Output("rate-table", "style_header", allow_duplicate=True),
-        Output("rate-table", "style_cell", allow_duplicate=True),
-        Output("rate-table", "style_data", allow_duplicate=True),
-        Output("rate-table", "style_data_conditional", allow_duplicate=True),
+    # Live-график перекрашивается при смене темы так же, как основной
+    app.clientside_callback(
+        ClientsideFunction(namespace="theme", function_name="applyFigureTheme"),
+        Output("live-graph", "figure", allow_duplicate=True),
         Input("theme-toggle", "value"),
-        Input("url", "pathname"),
+        State("live-graph", "figure"),
+        State("theme-config", "data"),
         prevent_initial_call=True
     )
-    def update_table_styles(theme, pathname):
-        # Проверяем, что мы на главной странице, где есть таблица
-        if pathname != "/info":
-            if theme == "dark":
-                return (
-                    # Table header style
-                    {
-                        "backgroundColor": "#333333",
-                        "color": "white",
-                        "fontWeight": "bold",
-                        "border": "1px solid #444"
-                    },
-                    # Table cell style
-                    {
-                        "backgroundColor": "#1e1e1e",
-                        "color": "white",
-                        "textAlign": "left",
-                        "border": "1px solid #333",
-                        "fontFamily": "'Segoe UI', Roboto, sans-serif"
-                    },
-                    # Table data style
-                    {
-                        "backgroundColor": "#252525"
-                    },
-                    # Conditional row styling
-                    [
-                        {
-                            "if": {"row_index": "odd"},
-                            "backgroundColor": "#1a1a1a"
-                        }
-                    ]
-                )
-            else:
-                return (
-                    # Table header style
-                    {
-                        "backgroundColor": "#4285F4",
-                        "color": "white",
-                        "fontWeight": "bold"
-                    },
-                    # Table cell style
-                    {
-                        "backgroundColor": "white",
-                        "color": "black",
-                        "textAlign": "left",
-                        "fontFamily": "'Segoe UI', Roboto, sans-serif"
-                    },
-                    # Table data style
-                    {
-                        "backgroundColor": "white"
-                    },
-                    # Conditional row styling
-                    [
-                        {
-                            "if": {"row_index": "odd"},
-                            "backgroundColor": "#f9f9f9"
-                        }
-                    ]
-                )
-        # На странице справки не обновляем стили таблицы
-        return dash.no_update, dash.no_update, dash.no_update, dash.no_update
-        
-    # Callback для стилей таблицы на странице информации
+
+    # Выгрузка идёт напрямую из маршрута /export, здесь только собирается ссылка на него
+    app.clientside_callback(
+        ClientsideFunction(namespace="export", function_name="link"),
+        Output("download-link", "href"),
+        Output("download-link", "className"),
+        Input("pair-dropdown", "value"),
+        Input("date-range", "start_date"),
+        Input("date-range", "end_date"),
+        Input("export-format", "value"),
+        Input("export-all-pairs", "value")
+    )
+
     @app.callback(
-        Output("info-table", "className"),
-        Input("theme-toggle", "value"),
-        Input("url", "pathname"),
-        prevent_initial_call=True
+        Output("compare-graph", "figure"),
+        Output("compare-correlation", "figure"),
+        Input("compare-pairs", "value"),
+        Input("compare-range", "start_date"),
+        Input("compare-range", "end_date"),
+        Input("compare-scale", "value"),
+        State("theme-toggle", "value")
     )
-    def update_info_table_styles(theme, pathname):
-        if pathname == "/info":
-            base_class = "mt-3 table-bordered table-hover table-responsive table-striped"
-            if theme == "dark":
-                return f"{base_class} table-dark"
-            else:
-                return base_class
-        return dash.no_update
-    
+    def update_comparison(pair_ids, start_date, end_date, scale, theme):
+        if not pair_ids:
+            return empty_figure(theme, "Выберите пары для сравнения"), empty_figure(theme)
+        if not start_date or not end_date:
+            return empty_figure(theme, "Выберите диапазон дат"), empty_figure(theme)
+
+        # pandas нужен только этой странице — импортируем при первом обращении
+        from app.comparison import get_rate_matrix, rebase, correlation
+
+        try:
+            # Один запрос по всем парам, дальше — pandas/NumPy
+            matrix = get_rate_matrix(
+                pair_ids,
+                date.fromisoformat(start_date[:10]),
+                date.fromisoformat(end_date[:10])
+            )
+        except Exception as e:
+            return empty_figure(theme, f"Ошибка загрузки: {e}"), empty_figure(theme)
+        if matrix.empty:
+            return empty_figure(theme, "Нет данных за выбранный период"), empty_figure(theme)
+
+        series = rebase(matrix) if scale == "rebased" else matrix
+        dates = [day.isoformat() for day in series.index]
+        fig = go.Figure()
+        for label in series.columns:
+            fig.add_trace(go.Scatter(x=dates, y=series[label].to_numpy(), mode="lines", name=label))
+        fig.update_layout(
+            xaxis_title="Дата",
+            yaxis_title="Индекс, начало периода = 100" if scale == "rebased" else "Курс",
+            hovermode="x unified"
+        )
+
+        corr = correlation(matrix).round(2)
+        heatmap = go.Figure(go.Heatmap(
+            z=corr.to_numpy(),
+            x=list(corr.columns),
+            y=list(corr.index),
+            zmin=-1,
+            zmax=1,
+            colorscale="RdBu",
+            text=corr.to_numpy(),
+            texttemplate="%{text}"
+        ))
+        heatmap.update_layout(yaxis_autorange="reversed")
+        return apply_figure_theme(fig, theme), apply_figure_theme(heatmap, theme)
+
+    # Графики сравнения перекрашиваются при смене темы так же, как основной
+    for graph_id in ("compare-graph", "compare-correlation"):
+        app.clientside_callback(
+            ClientsideFunction(namespace="theme", function_name="applyFigureTheme"),
+            Output(graph_id, "figure", allow_duplicate=True),
+            Input("theme-toggle", "value"),
+            State(graph_id, "figure"),
+            State("theme-config", "data"),
+            prevent_initial_call=True
+        )
+
+    # Тема переключается классом корневого контейнера, стили страниц и таблиц — в custom.css
+    app.clientside_callback(
+        ClientsideFunction(namespace="theme", function_name="containerClass"),
+        Output("main-container", "className"),
+        Input("theme-toggle", "value")
+    )
+
     # Добавляем callback для обработки URL и переключения страниц
     @app.callback(
         Output("page-content", "children"),
@@ -391,6 +549,9 @@ def register_callbacks(app):
         if pathname == "/info":
             from app.dashboard.pages.info import get_layout
             return get_layout()
+        elif pathname == "/compare":
+            from app.dashboard.pages.compare import get_layout
+            return get_layout()
         else:
             from app.dashboard.pages.dashboard import get_layout
             return get_layout()
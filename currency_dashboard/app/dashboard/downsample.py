@@ -0,0 +1,58 @@
+import numpy as np
+
+# Меньше точек на пиксель графика всё равно не различить
+MIN_POINTS = 200
+# С этого числа точек график рисуется через WebGL (Scattergl)
+WEBGL_THRESHOLD = 2000
+# Маркеры показываются только на коротких рядах
+MARKERS_THRESHOLD = 200
+
+
+def lttb_indices(x, y, threshold):
+    """Индексы точек, отобранных алгоритмом Largest-Triangle-Three-Buckets
+
+    x и y — numpy-массивы одинаковой длины, x возрастает. Первая и последняя
+    точки сохраняются всегда; в каждой корзине выбирается точка, образующая
+    наибольший треугольник с предыдущей выбранной и средним следующей корзины.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # Границы корзин для всех точек, кроме первой и последней
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    # Средние точки корзин считаются сразу для всех корзин
+    sums_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1)
+    sums_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1)
+    counts = np.diff(edges)
+    avg_x = np.append(sums_x / counts, x[-1])
+    avg_y = np.append(sums_y / counts, y[-1])
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        bucket_x = x[start:end]
+        bucket_y = y[start:end]
+        # Удвоенная площадь треугольника (предыдущая, кандидат, среднее следующей корзины)
+        areas = np.abs(
+            (x[previous] - avg_x[i + 1]) * (bucket_y - y[previous])
+            - (x[previous] - bucket_x) * (avg_y[i + 1] - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        selected[i + 1] = previous
+    return selected
+
+
+def downsample_series(dates, rates, max_points):
+    """Прореживает дневной ряд курсов до max_points точек с сохранением формы (LTTB)"""
+    max_points = max(MIN_POINTS, int(max_points or 0))
+    if len(dates) <= max_points:
+        return list(dates), list(rates)
+
+    x = np.array(dates, dtype="datetime64[D]").astype(np.float64)
+    y = np.asarray(rates, dtype=np.float64)
+    indices = lttb_indices(x, y, max_points)
+    return [dates[i] for i in indices], y[indices].tolist()
@@ -0,0 +1,162 @@
+import csv
+import io
+import zlib
+from datetime import date
+from flask import Response, request
+from app.db import SessionLocal
+from app.db.models import CurrencyPair
+from app.history import iter_rate_chunks
+
+EXPORT_COLUMNS = ["pair", "date", "rate"]
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "csv.gz": ("application/gzip", "csv.gz"),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+    "parquet": ("application/vnd.apache.parquet", "parquet")
+}
+
+
+def _csv_stream(chunks):
+    """CSV по мере чтения пачек из БД"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for rows in chunks:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _gzip_stream(stream):
+    """Сжимает поток байтов в формате gzip на лету"""
+    compressor = zlib.compressobj(wbits=31)
+    for data in stream:
+        compressed = compressor.compress(data)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+class _StreamSink(io.RawIOBase):
+    """Файл только для записи: накапливает байты до выдачи клиенту, но помнит общую позицию"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _parquet_stream(chunks):
+    """Parquet: каждая пачка строк записывается отдельной row group и сразу отдаётся"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([("pair", pa.string()), ("date", pa.date32()), ("rate", pa.float64())])
+    sink = _StreamSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        for rows in chunks:
+            pairs, days, rates = zip(*rows) if rows else ((), (), ())
+            writer.write_table(pa.table([list(pairs), list(days), list(rates)], schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def _xlsx_stream(chunks):
+    """Excel не пишется потоково, но строки идут в книгу write-only без DataFrame"""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("exchange_rates")
+    sheet.append(EXPORT_COLUMNS)
+    for rows in chunks:
+        for row in rows:
+            sheet.append(row)
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    yield buffer.getvalue()
+
+
+def _labelled(chunks, labels):
+    """Подставляет вместо pair_id подпись пары; avg из MySQL приходит Decimal — приводим к float"""
+    for rows in chunks:
+        yield [(labels[pair_id], day, float(rate)) for pair_id, day, rate in rows]
+
+
+def _parse_pairs(session, value):
+    """Пары для выгрузки: "all" или список id через запятую"""
+    query = session.query(CurrencyPair)
+    if value != "all":
+        ids = [int(pair_id) for pair_id in value.split(",") if pair_id.strip()]
+        query = query.filter(CurrencyPair.id.in_(ids))
+    pairs = query.order_by(CurrencyPair.id).all()
+    session.expunge_all()
+    return pairs
+
+
+def register_export_routes(server):
+    """Регистрирует на Flask-сервере маршрут потоковой выгрузки курсов /export"""
+
+    @server.route("/export")
+    def export_rates():
+        # /export?pairs=1,2|all&start=YYYY-MM-DD&end=YYYY-MM-DD&format=csv|csv.gz|xlsx|parquet
+        file_format = request.args.get("format", "csv")
+        if file_format not in EXPORT_FORMATS:
+            return Response(f"Неизвестный формат: {file_format}", status=400)
+        try:
+            start = date.fromisoformat(request.args["start"])
+            end = date.fromisoformat(request.args["end"])
+            session = SessionLocal()
+            try:
+                pairs = _parse_pairs(session, request.args.get("pairs", ""))
+            finally:
+                session.close()
+        except (KeyError, ValueError):
+            return Response("Укажите pairs, start и end в формате YYYY-MM-DD", status=400)
+        if not pairs or start > end:
+            return Response("Нет пар или неверный период", status=400)
+
+        if file_format == "parquet":
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                return Response("Для выгрузки в Parquet установите pyarrow", status=400)
+
+        labels = {pair.id: f"{pair.base_currency} → {pair.target_currency}" for pair in pairs}
+        chunks = _labelled(iter_rate_chunks(pairs, start, end), labels)
+        if file_format == "csv":
+            stream = _csv_stream(chunks)
+        elif file_format == "csv.gz":
+            stream = _gzip_stream(_csv_stream(chunks))
+        elif file_format == "parquet":
+            stream = _parquet_stream(chunks)
+        else:
+            stream = _xlsx_stream(chunks)
+
+        mimetype, extension = EXPORT_FORMATS[file_format]
+        return Response(
+            stream,
+            mimetype=mimetype,
+            headers={"Content-Disposition": f"attachment; filename=exchange_rates.{extension}"}
+        )
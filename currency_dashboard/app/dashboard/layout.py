@@ -1,35 +1,54 @@
 import dash_bootstrap_components as dbc
 from dash import dcc, html, dash_table
+from app.cache import reference_cache
+from app.config import LIVE_POLL_INTERVAL
 from app.db import SessionLocal
 from app.db.models import Currency, CurrencyPair
+from app.dashboard.theme import get_client_theme_config
 
 
-def get_currency_options():
+def _load_currency_options():
     session = SessionLocal()
     try:
-        currencies = session.query(Currency).all()
-        return [{"label": c.code, "value": c.code} for c in currencies]
+        codes = session.query(Currency.code).order_by(Currency.code).all()
+        return [{"label": code, "value": code} for (code,) in codes]
     finally:
         session.close()
 
 
-def get_currency_pair_options():
+def _load_currency_pair_options():
     session = SessionLocal()
     try:
-        pairs = session.query(CurrencyPair).all()
+        pairs = (
+            session.query(CurrencyPair.id, CurrencyPair.base_currency, CurrencyPair.target_currency)
+            .order_by(CurrencyPair.id)
+            .all()
+        )
         return [
             {
-                "label": f"{pair.base_currency} → {pair.target_currency}",
-                "value": str(pair.id)
+                "label": f"{base} → {target}",
+                "value": str(pair_id)
             }
-            for pair in pairs
+            for pair_id, base, target in pairs
         ]
     finally:
         session.close()
 
 
+def get_currency_options():
+    """Варианты выбора валют, кэшируются в памяти процесса"""
+    return reference_cache.get_or_load("currency_options", _load_currency_options)
+
+
+def get_currency_pair_options():
+    """Варианты выбора валютных пар, кэшируются до добавления новой пары"""
+    return reference_cache.get_or_load("currency_pair_options", _load_currency_pair_options)
+
+
 def build_layout():
     """Макет для страницы курсов валют"""
+    # Один список валют на оба выпадающих списка
+    currency_options = get_currency_options()
     return html.Div([
         dbc.Container([
             dbc.Card([
@@ -38,11 +57,11 @@ def build_layout():
                     dbc.Row([
                         dbc.Col([
                             html.Label("Базовая валюта"),
-                            dcc.Dropdown(id="base-currency", options=get_currency_options(), placeholder="USD")
+                            dcc.Dropdown(id="base-currency", options=currency_options, placeholder="USD")
                         ]),
                         dbc.Col([
                             html.Label("Целевая валюта"),
-                            dcc.Dropdown(id="target-currency", options=get_currency_options(), placeholder="EUR")
+                            dcc.Dropdown(id="target-currency", options=currency_options, placeholder="EUR")
                         ]),
                         dbc.Col([
                             html.Label(" "),
@@ -86,26 +105,67 @@ def build_layout():
                 dbc.Card([
                     dbc.CardHeader("Выбор периода"),
                     dbc.CardBody([
-                        dcc.DatePickerRange(id="date-range")
+                        dbc.Row([
+                            dbc.Col([
+                                dcc.DatePickerRange(id="date-range")
+                            ]),
+                            dbc.Col([
+                                # Свечи строятся по недельным и месячным агрегатам длинных периодов
+                                dcc.RadioItems(
+                                    id="chart-type",
+                                    options=[
+                                        {"label": "Линия", "value": "line"},
+                                        {"label": "Свечи", "value": "candles"}
+                                    ],
+                                    value="line",
+                                    labelStyle={"marginRight": "10px"},
+                                    inline=True
+                                )
+                            ])
+                        ])
                     ])
                 ], className="mb-3"),
 
                 dcc.Graph(id="exchange-rate-graph"),
+                dcc.Store(id="graph-width"),
 
                 html.H4("Таблица курсов", className="mt-4"),
                 dash_table.DataTable(
                     id="rate-table",
                     columns=[
                         {"name": "Пара", "id": "pair"},
-                        {"name": "Дата", "id": "date"},
-                        {"name": "Курс", "id": "rate"}
+                        {"name": "Дата", "id": "date", "type": "datetime"},
+                        {"name": "Курс", "id": "rate", "type": "numeric"}
                     ],
                     data=[],
+                    # Страницы, сортировка и фильтр обрабатываются на сервере запросом к exchange_rates
+                    page_action="custom",
+                    page_current=0,
                     page_size=10,
+                    page_count=1,
+                    sort_action="custom",
+                    sort_mode="single",
+                    sort_by=[],
+                    filter_action="custom",
+                    filter_query="",
                     style_table={"overflowX": "auto"},
                     style_cell_conditional=[],
-                    style_cell={"textAlign": "left"},
-                    style_header={}
+                    # Светлое оформление; тёмная тема переопределяет его в custom.css
+                    style_header={
+                        "backgroundColor": "#4285F4",
+                        "color": "white",
+                        "fontWeight": "bold"
+                    },
+                    style_cell={
+                        "textAlign": "left",
+                        "fontFamily": "'Segoe UI', Roboto, sans-serif"
+                    },
+                    style_data_conditional=[
+                        {
+                            "if": {"row_index": "odd"},
+                            "backgroundColor": "#f9f9f9"
+                        }
+                    ]
                 ),
 
                 html.H4("Экспорт таблицы", className="mt-4"),
@@ -115,20 +175,43 @@ def build_layout():
                             id="export-format",
                             options=[
                                 {"label": "CSV", "value": "csv"},
+                                {"label": "CSV (gzip)", "value": "csv.gz"},
+                                {"label": "Parquet", "value": "parquet"},
                                 {"label": "Excel", "value": "xlsx"}
                             ],
                             value="csv",
                             inline=True
                         )
-                    ], width=3),
+                    ], width=5),
                     dbc.Col([
-                        html.Button("Скачать", id="download-btn", className="btn btn-success")
+                        dcc.Checklist(
+                            id="export-all-pairs",
+                            options=[{"label": "Все пары", "value": "all"}],
+                            value=[],
+                            inline=True
+                        )
+                    ], width=2),
+                    dbc.Col([
+                        # Файл отдаёт потоковый маршрут /export, ссылку собирает клиентская функция
+                        html.A("Скачать", id="download-link", href="", className="btn btn-success disabled")
                     ], width=2)
-                ]),
-                dcc.Download(id="download-data")
+                ])
             ]),
 
-            html.Div(id="live-container", className="mt-4")
+            # Каркас live-режима строится один раз, дальше callback'и меняют только текст и точки графика
+            html.Div(id="live-container", className="mt-4", style={"display": "none"}, children=[
+                dbc.Card([
+                    dbc.CardHeader(html.H3("Текущий курс", className="mb-0")),
+                    dbc.CardBody([
+                        html.P(id="live-date"),
+                        html.H4(id="live-rate", className="live-rate"),
+                        dcc.Graph(id="live-graph", config={"displayModeBar": False}, style={"height": "250px"})
+                    ])
+                ], className="live-card"),
+                dcc.Interval(id="live-interval", interval=LIVE_POLL_INTERVAL * 1000, disabled=True),
+                # Версия последнего показанного курса: опрос без изменений ничего не передаёт
+                dcc.Store(id="live-version")
+            ])
         ], fluid=True)
     ])
 
@@ -146,6 +229,9 @@ def get_main_layout():
                     dbc.NavItem(dbc.NavLink([
                         html.I(className="fas fa-chart-line me-1"), "📊 Курсы валют"
                     ], href="/", active="exact")),
+                    dbc.NavItem(dbc.NavLink([
+                        html.I(className="fas fa-layer-group me-1"), "📈 Сравнение пар"
+                    ], href="/compare", active="exact")),
                     dbc.NavItem(dbc.NavLink([
                         html.I(className="fas fa-info-circle me-1"), "🌐 Справка по валютам"
                     ], href="/info", active="exact"))
@@ -178,6 +264,9 @@ def get_main_layout():
         
         # URL location component
         dcc.Location(id="url", refresh=False),
+
+        # Настройки тем для перекраски графиков на клиенте
+        dcc.Store(id="theme-config", data=get_client_theme_config()),
         
         # Контент страницы с отступом для navbar
         html.Div(id="page-content", style={"paddingTop": "70px", "minHeight": "calc(100vh - 70px)"})
@@ -0,0 +1,62 @@
+from datetime import date, timedelta
+from dash import html, dcc
+import dash_bootstrap_components as dbc
+from app.dashboard.layout import get_currency_pair_options
+
+
+def get_layout():
+    """Создает макет страницы сравнения нескольких валютных пар"""
+    today = date.today()
+    return dbc.Container([
+        dbc.Breadcrumb(
+            items=[
+                {"label": "Главная", "href": "/", "external_link": True},
+                {"label": "Сравнение пар", "active": True},
+            ],
+            className="mt-2 mb-3"
+        ),
+
+        html.H2("📈 Сравнение валютных пар", className="mt-2 mb-4"),
+
+        dbc.Card([
+            dbc.CardBody([
+                dbc.Row([
+                    dbc.Col([
+                        html.Label("Валютные пары"),
+                        dcc.Dropdown(
+                            id="compare-pairs",
+                            options=get_currency_pair_options(),
+                            multi=True,
+                            placeholder="Выберите пары"
+                        )
+                    ], width=6),
+                    dbc.Col([
+                        html.Label("Период"),
+                        # По умолчанию — последний квартал
+                        dcc.DatePickerRange(
+                            id="compare-range",
+                            start_date=today - timedelta(days=91),
+                            end_date=today
+                        )
+                    ], width=3),
+                    dbc.Col([
+                        html.Label("Шкала"),
+                        dcc.RadioItems(
+                            id="compare-scale",
+                            options=[
+                                {"label": "Курсы", "value": "rates"},
+                                {"label": "Индекс (100)", "value": "rebased"}
+                            ],
+                            value="rebased",
+                            labelStyle={"marginRight": "10px"},
+                            inline=True
+                        )
+                    ], width=3)
+                ])
+            ])
+        ], className="mb-4"),
+
+        dcc.Loading(dcc.Graph(id="compare-graph")),
+        html.H4("Корреляция дневных доходностей", className="mt-4"),
+        dcc.Graph(id="compare-correlation")
+    ], fluid=True)
@@ -1,26 +1,20 @@
 from dash import html, dcc
 import dash_bootstrap_components as dbc
-import requests
-import pandas as pd
+from app.reference import get_reference_snapshot
 
 
 def get_layout():
-    # Получаем все валюты
-    try:
-        resp = requests.get("https://api.frankfurter.app/currencies")
-        currencies_data = resp.json()
-        
-        # Получаем базовые курсы относительно EUR
-        rates_resp = requests.get("https://api.frankfurter.app/latest?from=EUR")
-        rates_data = rates_resp.json()
-        rates = rates_data.get('rates', {})
-    except Exception as e:
-        currencies_data = {}
-        rates = {}
-        error_message = html.Div(
-            html.P(f"Ошибка при загрузке данных: {str(e)}"),
-            className="alert alert-danger"
+    # Справочник и курсы к EUR берутся из снимка, который обновляет планировщик
+    snapshot = get_reference_snapshot()
+    currencies_data = snapshot["currencies"]
+    rates = snapshot["rates"]
+    if not currencies_data:
+        status_message = html.Div(
+            html.P("Справочные данные ещё не загружены, попробуйте обновить страницу позже."),
+            className="alert alert-warning"
         )
+    else:
+        status_message = None
 
     # Создаем таблицу валют с информацией о курсах
     currency_rows = []
@@ -71,6 +65,11 @@ def get_layout():
         
         html.H4("Поддерживаемые валюты"),
         html.P("Ниже представлен список всех валют, поддерживаемых API, с текущими курсами относительно EUR:"),
+        html.P(
+            f"Курсы на {snapshot['date'].strftime('%Y-%m-%d')}" if snapshot["date"] else "",
+            className="text-muted"
+        ),
+        status_message,
         
         # Таблица валют
         dbc.Table(
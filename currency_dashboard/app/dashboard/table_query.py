@@ -0,0 +1,78 @@
+from datetime import date, timedelta
+
+# Операторы языка filter_query DataTable и их SQL-аналоги
+FILTER_OPERATORS = [
+    ("ge ", ">="),
+    ("le ", "<="),
+    ("lt ", "<"),
+    ("gt ", ">"),
+    ("ne ", "!="),
+    ("eq ", "="),
+    ("contains ", "contains"),
+    ("datestartswith ", "datestartswith"),
+    ("s> ", ">"),
+    ("s< ", "<"),
+    (">= ", ">="),
+    ("<= ", "<="),
+    ("> ", ">"),
+    ("< ", "<"),
+    ("!= ", "!="),
+    ("= ", "="),
+]
+
+
+def _split_filter_part(part):
+    """Разбирает одно условие вида "{rate} ge 1.1" на (колонка, оператор, значение)"""
+    for token, operator in FILTER_OPERATORS:
+        if token in part:
+            name_part, value_part = part.split(token, 1)
+            name = name_part[name_part.find("{") + 1:name_part.rfind("}")]
+            value = value_part.strip()
+            if value and value[0] == value[-1] and value[0] in ("'", '"', "`"):
+                value = value[1:-1]
+            return name.strip(), operator, value
+    return None, None, None
+
+
+def _date_prefix_range(prefix):
+    """Интервал [начало, конец) для префикса даты вида YYYY, YYYY-MM или YYYY-MM-DD"""
+    if len(prefix) == 4:
+        start = date(int(prefix), 1, 1)
+        return start, date(start.year + 1, 1, 1)
+    if len(prefix) == 7:
+        start = date.fromisoformat(f"{prefix}-01")
+        return start, (start + timedelta(days=32)).replace(day=1)
+    start = date.fromisoformat(prefix[:10])
+    return start, start + timedelta(days=1)
+
+
+def parse_filter_query(filter_query):
+    """Переводит filter_query таблицы курсов в условия [(колонка, оператор, значение)]
+
+    Колонка date сравнивается по дням, rate — как число. Условия, которые
+    не удалось разобрать, пропускаются, чтобы ввод в фильтре не ломал таблицу.
+    """
+    conditions = []
+    for part in (filter_query or "").split(" && "):
+        column, operator, value = _split_filter_part(part)
+        if not column or not value:
+            continue
+        try:
+            if column == "date":
+                if operator in ("contains", "datestartswith"):
+                    start, end = _date_prefix_range(value)
+                    conditions += [("date", ">=", start), ("date", "<", end)]
+                else:
+                    conditions.append(("date", operator, date.fromisoformat(value[:10])))
+            elif column == "rate" and operator not in ("contains", "datestartswith"):
+                conditions.append(("rate", operator, float(value)))
+        except ValueError:
+            continue
+    return conditions
+
+
+def parse_sort_by(sort_by):
+    """Колонка и направление сортировки из sort_by DataTable, по умолчанию — по дате"""
+    if sort_by and sort_by[0].get("column_id") in ("date", "rate"):
+        return sort_by[0]["column_id"], sort_by[0].get("direction") == "desc"
+    return "date", False
@@ -0,0 +1,66 @@
+import plotly.graph_objects as go
+import plotly.io as pio
+
+# Оформление графиков по темам. Те же настройки применяет клиентская функция
+# assets/theme.js при переключении темы, без запроса к серверу
+FIGURE_THEMES = {
+    "light": {
+        "template": "plotly_white",
+        "layout": {
+            "plot_bgcolor": "white",
+            "paper_bgcolor": "white",
+            "font": {"color": "#2a3f5f"}
+        },
+        "line_color": "#1A73E8",  # Google синий для светлой темы
+        "marker_color": "#0F4BAA"  # Темный синий
+    },
+    "dark": {
+        "template": "plotly_dark",
+        "layout": {
+            "plot_bgcolor": "#1E1E1E",
+            "paper_bgcolor": "#121212",
+            "font": {"color": "#E0E0E0"}
+        },
+        "line_color": "#8AB4F8",  # Голубой для темной темы
+        "marker_color": "#4285F4"  # Google синий
+    }
+}
+
+# Метка основной серии графика: только её цвет зависит от темы
+PRIMARY_TRACE = "primary"
+
+
+def apply_figure_theme(fig, theme):
+    """Оформляет график под тему: шаблон, фон, шрифт и цвет основной серии"""
+    config = FIGURE_THEMES.get(theme, FIGURE_THEMES["light"])
+    fig.update_layout(template=config["template"], **config["layout"])
+    fig.update_traces(
+        line=dict(color=config["line_color"]),
+        marker=dict(color=config["marker_color"]),
+        selector=dict(meta=PRIMARY_TRACE)
+    )
+    return fig
+
+
+def empty_figure(theme, title=None):
+    """Пустой график с оформлением выбранной темы"""
+    fig = go.Figure()
+    if title:
+        fig.update_layout(title=title)
+    return apply_figure_theme(fig, theme)
+
+
+def get_client_theme_config():
+    """Настройки тем для клиентских callback'ов: развёрнутые шаблоны plotly и цвета"""
+    return {
+        "figure": {
+            theme: {
+                "template": pio.templates[config["template"]].to_plotly_json(),
+                "layout": config["layout"],
+                "line_color": config["line_color"],
+                "marker_color": config["marker_color"]
+            }
+            for theme, config in FIGURE_THEMES.items()
+        },
+        "primary_trace": PRIMARY_TRACE
+    }
@@ -1,14 +1,85 @@
-from sqlalchemy import create_engine
+from sqlalchemy import Float, create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.schema import CreateColumn
 from app.config import SQLALCHEMY_DATABASE_URL
 
-# Создаем MySQL движок с connection pooling
+# Настройки SQLite: WAL — веб-процессы читают, пока сборщик пишет; NORMAL — fsync
+# только на контрольных точках WAL; кэш страниц 64 МБ, временные таблицы в памяти
+SQLITE_PRAGMAS = (
+    "journal_mode=WAL",
+    "synchronous=NORMAL",
+    "foreign_keys=ON",
+    "busy_timeout=30000",
+    "cache_size=-65536",
+    "temp_store=MEMORY",
+    "mmap_size=268435456"
+)
+
+
+def _engine_options(url):
+    """Параметры движка под СУБД: пул с проверкой соединений нужен только серверной БД"""
+    backend = make_url(url).get_backend_name()
+    if backend == "sqlite":
+        # Одним соединением пользуются потоки веб-сервера и планировщика
+        return {"connect_args": {"check_same_thread": False}}
+    if backend == "duckdb":
+        return {}
+    return {
+        "pool_recycle": 3600,  # Переподключение к серверу каждый час
+        "pool_pre_ping": True  # Проверка, что соединение активно, перед тем как его использовать
+    }
+
+
+# Движок БД из DATABASE_URL: MySQL с connection pooling, SQLite или DuckDB
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
     echo=False,
     future=True,
-    pool_recycle=3600,  # Переподключение к серверу каждый час
-    pool_pre_ping=True  # Проверка, что соединение активно, перед тем как его использовать
+    **_engine_options(SQLALCHEMY_DATABASE_URL)
 )
 SessionLocal = sessionmaker(bind=engine, autoflush=False)
 Base = declarative_base()
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(f"PRAGMA {pragma}")
+    cursor.close()
+
+
+if engine.dialect.name == "sqlite":
+    event.listen(engine, "connect", _set_sqlite_pragmas)
+
+
+# В DuckDB нет AUTO_INCREMENT и SERIAL: суррогатные ключи берутся из последовательностей,
+# которые создаются перед таблицами
+def _id_sequence(column):
+    return f"{column.table.name}_{column.name}_seq"
+
+
+@compiles(CreateColumn, "duckdb")
+def _duckdb_column(element, compiler, **kw):
+    column = element.element
+    if column is column.table.autoincrement_column:
+        return (f"{compiler.preparer.format_column(column)} INTEGER "
+                f"DEFAULT nextval('{_id_sequence(column)}') NOT NULL")
+    return compiler.visit_create_column(element, **kw)
+
+
+@compiles(Float, "duckdb")
+@compiles(Float, "mysql")
+def _double(element, compiler, **kw):
+    # FLOAT в DuckDB и MySQL — 4 байта, курсы храним с двойной точностью
+    return "DOUBLE"
+
+
+@event.listens_for(Base.metadata, "before_create")
+def _create_id_sequences(target, connection, tables=(), **kw):
+    if connection.dialect.name != "duckdb":
+        return
+    for table in tables:
+        if table.autoincrement_column is not None:
+            connection.exec_driver_sql(f"CREATE SEQUENCE IF NOT EXISTS {_id_sequence(table.autoincrement_column)}")
@@ -1,23 +1,63 @@
-import requests
-from app.db import SessionLocal
+import json
+import os
+from app.cache import reference_cache
+from sqlalchemy_utils import database_exists, create_database
+from app.db import Base, SessionLocal, engine
 from app.db.models import Currency
+from app.db.upsert import upsert
+from app.fetchers.registry import get_primary_provider
 
+BUNDLED_CURRENCIES_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "currencies.json")
 
-def populate_currencies_from_api():
-    url = "https://api.frankfurter.app/currencies"
-    response = requests.get(url)
-    data = response.json()
+
+def load_bundled_currencies():
+    """Справочник валют из снимка, поставляемого с приложением: {code: name}"""
+    with open(BUNDLED_CURRENCIES_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def populate_currencies_from_api(offline=False):
+    """Заполняет справочник валют: добавляет новые коды и обновляет изменившиеся названия
+
+    Справочник берётся у основного источника курсов, а при offline=True или
+    недоступности источника — из снимка app/db/fixtures/currencies.json.
+    """
+    data = None
+    if not offline:
+        try:
+            data = get_primary_provider().fetch_currencies()
+        except Exception as e:
+            print(f"[WARN] Справочник валют недоступен ({e}), используется встроенный снимок")
+    if not data:
+        data = load_bundled_currencies()
 
     session = SessionLocal()
     try:
-        for code, name in data.items():
-            exists = session.query(Currency).filter_by(code=code).first()
-            if not exists:
-                session.add(Currency(code=code, name=name))
+        # Существующие валюты читаются одним запросом, записываются только отличия
+        existing = dict(session.query(Currency.code, Currency.name).all())
+        changed = {code: name for code, name in data.items() if existing.get(code) != name}
+        upsert_currencies(session, changed)
         session.commit()
-        print(f"[INFO] Добавлены {len(data)} валют в базу.")
+        reference_cache.invalidate("currency_options")
+        added = sum(1 for code in changed if code not in existing)
+        print(f"[INFO] Справочник валют: добавлено {added}, обновлено названий {len(changed) - added}, "
+              f"всего в источнике {len(data)}")
     except Exception as e:
         session.rollback()
         print("Ошибка при добавлении валют:", str(e))
     finally:
         session.close()
+
+
+def upsert_currencies(session, currencies):
+    """Добавляет валюты и обновляет их названия по справочнику {code: name}"""
+    upsert(session, Currency, [{"code": code, "name": name} for code, name in currencies.items()], ["name"])
+
+
+def init_database(offline=False):
+    """Создаёт БД и таблицы и заполняет справочник валют — разово, командой init_db.py"""
+    # Файлы SQLite и DuckDB создаются при первом подключении, серверную БД создаём явно
+    if engine.dialect.name not in ("sqlite", "duckdb") and not database_exists(engine.url):
+        create_database(engine.url)
+    Base.metadata.create_all(bind=engine)
+    populate_currencies_from_api(offline=offline)
@@ -0,0 +1,117 @@
+from sqlalchemy import Float, delete, func, inspect, select
+from sqlalchemy.dialects.mysql import FLOAT
+from sqlalchemy.schema import AddConstraint
+from app.cache import rate_cache
+from app.db import Base, SessionLocal, engine
+from app.db.models import ExchangeRate, CurrencyPair
+from app.rollups import refresh_rollups
+
+RATE_KEY_NAME = "_pair_source_ts_uc"
+
+
+def _delete_duplicates(session, pair_id):
+    """Удаляет дубликаты курсов пары, оставляя по одной (последней) записи на источник и дату"""
+    keep = (
+        select(func.max(ExchangeRate.id).label("id"))
+        .where(ExchangeRate.pair_id == pair_id)
+        .group_by(ExchangeRate.source_id, ExchangeRate.timestamp)
+        .subquery()
+    )
+    result = session.execute(
+        delete(ExchangeRate)
+        .where(ExchangeRate.pair_id == pair_id)
+        .where(ExchangeRate.id.not_in(select(keep.c.id)))
+    )
+    return result.rowcount
+
+
+def _ensure_rate_key():
+    """Добавляет уникальный ключ (pair_id, source_id, timestamp) в уже существующую таблицу"""
+    existing = {c["name"] for c in inspect(engine).get_unique_constraints(ExchangeRate.__tablename__)}
+    if RATE_KEY_NAME in existing:
+        return False
+    constraint = next(c for c in ExchangeRate.__table__.constraints if c.name == RATE_KEY_NAME)
+    with engine.begin() as conn:
+        conn.execute(AddConstraint(constraint))
+    return True
+
+
+def _ensure_rate_indexes():
+    """Создаёт недостающие индексы exchange_rates в уже существующей таблице"""
+    for index in ExchangeRate.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
+
+
+def compact_exchange_rates():
+    """Схлопывает накопленные дубликаты exchange_rates и включает уникальный ключ"""
+    session = SessionLocal()
+    removed = 0
+    try:
+        # Чистим попарно, чтобы не держать блокировку на всю таблицу
+        for (pair_id,) in session.query(CurrencyPair.id).all():
+            deleted = _delete_duplicates(session, pair_id)
+            session.commit()
+            if deleted:
+                print(f"[OK] Пара {pair_id}: удалено дубликатов {deleted}")
+            removed += deleted
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+    # Ключ и индексы догоняют таблицы MySQL, созданные до их появления; таблицы SQLite
+    # и DuckDB сразу создаются с ними, а ALTER TABLE ADD CONSTRAINT они не поддерживают
+    if engine.dialect.name == "mysql":
+        if _ensure_rate_key():
+            print(f"[INFO] Добавлен уникальный ключ {RATE_KEY_NAME}")
+        _ensure_rate_indexes()
+    if removed:
+        rate_cache.invalidate()
+    print(f"[INFO] Сжатие завершено, удалено строк: {removed}")
+    return removed
+
+
+def widen_rate_columns():
+    """Переводит курсы в таблицах MySQL, созданных с FLOAT одинарной точности, на DOUBLE"""
+    if engine.dialect.name != "mysql":
+        return 0
+    inspector = inspect(engine)
+    existing = set(inspector.get_table_names())
+    quote = engine.dialect.identifier_preparer.quote
+    widened = 0
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing:
+                continue
+            single = {c["name"] for c in inspector.get_columns(table.name) if isinstance(c["type"], FLOAT)}
+            for column in table.columns:
+                if isinstance(column.type, Float) and column.name in single:
+                    null = "NULL" if column.nullable else "NOT NULL"
+                    conn.exec_driver_sql(f"ALTER TABLE {quote(table.name)} MODIFY {quote(column.name)} DOUBLE {null}")
+                    print(f"[OK] {table.name}.{column.name}: FLOAT -> DOUBLE")
+                    widened += 1
+    if widened:
+        rate_cache.invalidate()
+    return widened
+
+
+def rebuild_rollups():
+    """Пересчитывает недельные и месячные агрегаты по всем уже записанным курсам"""
+    session = SessionLocal()
+    try:
+        for (pair_id,) in session.query(CurrencyPair.id).all():
+            rows = [
+                {"pair_id": pair_id, "timestamp": timestamp}
+                for (timestamp,) in session.query(ExchangeRate.timestamp).filter_by(pair_id=pair_id).distinct()
+            ]
+            refresh_rollups(session, rows)
+            session.commit()
+            if rows:
+                print(f"[OK] Пара {pair_id}: агрегаты пересчитаны по {len(rows)} дням")
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+    rate_cache.invalidate()
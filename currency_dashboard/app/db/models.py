@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Date, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from app.db import Base
 import datetime
@@ -40,5 +40,85 @@ class ExchangeRate(Base):
     timestamp = Column(DateTime, default=datetime.datetime.utcnow, nullable=False)
     rate = Column(Float, nullable=False)
 
+    __table_args__ = (
+        # Один курс на пару, источник и дату публикации
+        UniqueConstraint('pair_id', 'source_id', 'timestamp', name='_pair_source_ts_uc'),
+        # Поиск последних и диапазонных курсов пары без сортировки всей таблицы
+        Index('ix_exchange_rates_pair_ts', pair_id, timestamp.desc()),
+    )
+
     pair = relationship("CurrencyPair")
     source = relationship("Source")
+
+class LatestRate(Base):
+    """Последний собранный курс пары, обновляется планировщиком вместе с exchange_rates"""
+    __tablename__ = "latest_rates"
+    pair_id = Column(Integer, ForeignKey("currency_pairs.id"), primary_key=True)
+    source_id = Column(Integer, ForeignKey("sources.id"), nullable=False)
+    timestamp = Column(DateTime, nullable=False)
+    rate = Column(Float, nullable=False)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, nullable=False)
+
+    pair = relationship("CurrencyPair")
+    source = relationship("Source")
+
+class ReferenceRate(Base):
+    """Курс валюты к базовой (EUR) из последнего снимка справочника для страницы /info"""
+    __tablename__ = "reference_rates"
+    currency_code = Column(String(3), ForeignKey("currencies.code"), primary_key=True)
+    base_currency = Column(String(3), nullable=False)
+    rate = Column(Float, nullable=False)
+    date = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, nullable=False)
+
+class CoveredRange(Base):
+    """Интервал дат, за который история пары уже загружена в exchange_rates"""
+    __tablename__ = "covered_ranges"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    pair_id = Column(Integer, ForeignKey("currency_pairs.id"), nullable=False, index=True)
+    start_date = Column(Date, nullable=False)
+    end_date = Column(Date, nullable=False)
+
+    pair = relationship("CurrencyPair")
+
+class BaseRate(Base):
+    """Курс валюты к базовой валюте триангуляции на дату; вектор дня — все строки с этой датой"""
+    __tablename__ = "base_rates"
+    date = Column(Date, primary_key=True)
+    currency_code = Column(String(3), primary_key=True)
+    rate = Column(Float, nullable=False)
+
+class BaseRateRange(Base):
+    """Интервал дат, за который векторы базовых курсов уже загружены в base_rates"""
+    __tablename__ = "base_rate_ranges"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    start_date = Column(Date, nullable=False)
+    end_date = Column(Date, nullable=False)
+
+class RateRollup(Base):
+    """Недельный или месячный OHLC-агрегат дневных курсов пары, обновляется при записи курсов"""
+    __tablename__ = "rate_rollups"
+    pair_id = Column(Integer, ForeignKey("currency_pairs.id"), primary_key=True)
+    period = Column(String(5), primary_key=True)  # week или month
+    period_start = Column(Date, primary_key=True)
+    open = Column(Float, nullable=False)
+    high = Column(Float, nullable=False)
+    low = Column(Float, nullable=False)
+    close = Column(Float, nullable=False)
+    mean = Column(Float, nullable=False)
+    days = Column(Integer, nullable=False)
+
+    pair = relationship("CurrencyPair")
+
+class LeaderLease(Base):
+    """Аренда роли ведущего процесса: задачу выполняет только держатель неистёкшей аренды"""
+    __tablename__ = "leader_leases"
+    name = Column(String(50), primary_key=True)
+    holder = Column(String(100), nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+class PairView(Base):
+    """Последний просмотр пары в live-режиме: по нему сборщик повышает частоту опроса"""
+    __tablename__ = "pair_views"
+    pair_id = Column(Integer, ForeignKey("currency_pairs.id"), primary_key=True)
+    viewed_at = Column(DateTime, nullable=False)
@@ -0,0 +1,58 @@
+import datetime
+from app.db.models import BaseRate, Currency, ExchangeRate, LatestRate, PairView, RateRollup, ReferenceRate
+from app.db.upsert import insert_ignore, upsert
+
+
+def upsert_rates(session, rows):
+    """Записывает курсы upsert'ом по ключу (pair_id, source_id, timestamp)
+
+    rows — список словарей с ключами pair_id, source_id, timestamp, rate.
+    Повторная запись того же дня от того же источника обновляет курс, а не создаёт дубликат.
+    """
+    upsert(session, ExchangeRate, rows, ["rate"])
+
+
+def upsert_latest_rates(session, rows):
+    """Обновляет latest_rates по тем же строкам, что записаны в exchange_rates
+
+    Вызывается в той же транзакции, что и upsert_rates, чтобы live-режим читал
+    последний курс одной выборкой по первичному ключу. Курс за более позднюю
+    дату, уже записанный в latest_rates, строки с прошлой датой не заменяют.
+    """
+    now = datetime.datetime.utcnow()
+    upsert(session, LatestRate, [{**row, "updated_at": now} for row in rows],
+           ["source_id", "timestamp", "rate", "updated_at"], newer="timestamp")
+
+
+def upsert_reference_rates(session, base, timestamp, rates):
+    """Заменяет снимок курсов base ко всем валютам в reference_rates"""
+    now = datetime.datetime.utcnow()
+    upsert(session, ReferenceRate, [
+        {"currency_code": code, "base_currency": base, "rate": rate, "date": timestamp, "updated_at": now}
+        for code, rate in rates.items()
+    ], ["base_currency", "rate", "date", "updated_at"])
+
+
+def upsert_base_rates(session, vectors):
+    """Записывает векторы базовых курсов {date: {code: rate}} в base_rates"""
+    rows = [
+        {"date": day, "currency_code": code, "rate": rate}
+        for day, rates in vectors.items()
+        for code, rate in rates.items()
+    ]
+    upsert(session, BaseRate, rows, ["rate"])
+
+
+def upsert_rollups(session, rows):
+    """Записывает агрегаты в rate_rollups по ключу (pair_id, period, period_start)"""
+    upsert(session, RateRollup, rows, ["open", "high", "low", "close", "mean", "days"])
+
+
+def ensure_currencies(session, codes):
+    """Добавляет отсутствующие валюты одной вставкой с пропуском существующих; название — сам код"""
+    insert_ignore(session, Currency, [{"code": code, "name": code} for code in codes])
+
+
+def upsert_pair_view(session, pair_id, viewed_at):
+    """Отмечает время последнего просмотра пары"""
+    upsert(session, PairView, [{"pair_id": pair_id, "viewed_at": viewed_at}], ["viewed_at"])
@@ -0,0 +1,89 @@
+from sqlalchemy import UniqueConstraint, case, column, select, table
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+# С какого размера пачки DuckDB получает строки одним DataFrame, а не построчным executemany
+DUCKDB_BULK_ROWS = 1000
+DUCKDB_BULK_SOURCE = "_bulk_rows"
+
+
+def _conflict_key(model):
+    """Ключ конфликта: уникальное ограничение таблицы, если оно есть, иначе первичный ключ"""
+    for constraint in model.__table__.constraints:
+        if isinstance(constraint, UniqueConstraint):
+            return [c.name for c in constraint.columns]
+    return [c.name for c in model.__table__.primary_key.columns]
+
+
+def _on_conflict_update(stmt, model, update, newer=None):
+    return stmt.on_conflict_do_update(
+        index_elements=_conflict_key(model),
+        set_={name: stmt.excluded[name] for name in update},
+        where=stmt.excluded[newer] >= model.__table__.c[newer] if newer else None
+    )
+
+
+def _on_duplicate_key_update(stmt, model, update, newer=None):
+    if not newer:
+        return stmt.on_duplicate_key_update({name: stmt.inserted[name] for name in update})
+    # В MySQL нет WHERE у ON DUPLICATE KEY UPDATE: каждая колонка обновляется через условие,
+    # а колонка-условие — последней, потому что присваивания выполняются слева направо
+    table = model.__table__
+    fresh = stmt.inserted[newer] >= table.c[newer]
+    names = [name for name in update if name != newer] + [newer]
+    return stmt.on_duplicate_key_update([
+        (name, case((fresh, stmt.inserted[name]), else_=table.c[name])) for name in names
+    ])
+
+
+def _duckdb_bulk_upsert(session, model, rows, update, newer=None):
+    """Загружает пачку в DuckDB колонками: строки регистрируются как DataFrame и вставляются одним INSERT ... SELECT"""
+    import pandas as pd
+
+    frame = pd.DataFrame(rows)
+    source = table(DUCKDB_BULK_SOURCE, *[column(name) for name in frame.columns])
+    stmt = postgresql_insert(model).from_select(list(frame.columns), select(*source.c))
+    stmt = _on_conflict_update(stmt, model, update, newer)
+    driver = session.connection().connection.driver_connection
+    driver.register(DUCKDB_BULK_SOURCE, frame)
+    try:
+        session.execute(stmt)
+    finally:
+        driver.unregister(DUCKDB_BULK_SOURCE)
+
+
+def upsert(session, model, rows, update, newer=None):
+    """Вставляет строки, при совпадении ключа обновляя колонки update, — в синтаксисе текущей СУБД
+
+    MySQL — INSERT ... ON DUPLICATE KEY UPDATE, SQLite и DuckDB — INSERT ... ON CONFLICT DO UPDATE.
+    newer — колонка (например, timestamp): существующая строка обновляется, только если
+    новое значение в ней не меньше сохранённого. Пачки от DUCKDB_BULK_ROWS строк DuckDB загружает колонками.
+    """
+    if not rows:
+        return
+    dialect = session.get_bind().dialect.name
+    if dialect == "mysql":
+        stmt = _on_duplicate_key_update(mysql_insert(model), model, update, newer)
+    elif dialect == "sqlite":
+        stmt = _on_conflict_update(sqlite_insert(model), model, update, newer)
+    elif len(rows) >= DUCKDB_BULK_ROWS:
+        _duckdb_bulk_upsert(session, model, rows, update, newer)
+        return
+    else:
+        stmt = _on_conflict_update(postgresql_insert(model), model, update, newer)
+    session.execute(stmt, rows)
+
+
+def insert_ignore(session, model, rows):
+    """Вставляет строки, пропуская те, чей ключ уже есть в таблице"""
+    if not rows:
+        return
+    dialect = session.get_bind().dialect.name
+    if dialect == "mysql":
+        stmt = mysql_insert(model).prefix_with("IGNORE")
+    elif dialect == "sqlite":
+        stmt = sqlite_insert(model).on_conflict_do_nothing()
+    else:
+        stmt = postgresql_insert(model).on_conflict_do_nothing()
+    session.execute(stmt, rows)
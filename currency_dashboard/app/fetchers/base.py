@@ -0,0 +1,49 @@
+from app.db.models import Source
+
+# Кросс-курс округляется до значащих цифр, а не знаков после запятой: курсы ЕЦБ
+# публикуются с 5–6 значащими цифрами, а курсы слабых валют (IDR→USD ≈ 6e-05)
+# при округлении до 6 знаков теряли почти всю точность
+RATE_SIGNIFICANT_DIGITS = 8
+
+
+def round_rate(rate):
+    """Кросс-курс, округлённый до RATE_SIGNIFICANT_DIGITS значащих цифр"""
+    return float(f"{rate:.{RATE_SIGNIFICANT_DIGITS}g}")
+
+
+class RateProvider:
+    """Источник курсов валют
+
+    name и api_url записываются в таблицу sources, а курсы, полученные
+    от источника, сохраняются с его source_id.
+    """
+    name = None
+    api_url = None
+
+    def fetch_latest(self, base: str, targets=None, refresh=False):
+        """Последние курсы base к targets (или ко всем валютам): (datetime, {target: rate})
+
+        refresh=True — запросить источник, даже если по календарю публикаций новых курсов быть не должно.
+        """
+        raise NotImplementedError
+
+    def fetch_base_series(self, base: str, start_date, end_date):
+        """Дневные курсы base ко всем валютам за период одним запросом: {date: {code: rate}}"""
+        raise NotImplementedError
+
+    def fetch_currencies(self):
+        """Справочник поддерживаемых валют: {code: name}"""
+        raise NotImplementedError
+
+    def __repr__(self):
+        return f"<RateProvider {self.name}>"
+
+
+def get_or_create_source(session, provider):
+    """Возвращает запись источника для провайдера, создавая её при необходимости"""
+    source = session.query(Source).filter_by(name=provider.name).first()
+    if not source:
+        source = Source(name=provider.name, api_url=provider.api_url)
+        session.add(source)
+        session.commit()
+    return source
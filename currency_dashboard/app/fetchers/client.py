@@ -0,0 +1,159 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from app.config import (
+    HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT, HTTP_RETRIES, HTTP_BACKOFF,
+    HTTP_POOL_SIZE, HTTP_MAX_WORKERS, HTTP_CACHE_SIZE
+)
+from app.fetchers.ecb_calendar import publication_pending
+
+_lock = threading.Lock()
+_session = None
+_executor = None
+# Отмечает потоки пула, чтобы вложенный get_many не ждал сам себя
+_worker = threading.local()
+# Кэш ответов: url -> {"body", "etag", "last_modified", "fetched_at", "expires_at"}
+_cache = OrderedDict()
+_cache_stats = {"hits": 0, "skipped": 0, "not_modified": 0, "misses": 0}
+
+
+def get_session():
+    """Общая HTTP-сессия: пул keep-alive соединений и повторы с экспоненциальной паузой"""
+    global _session
+    with _lock:
+        if _session is None:
+            retry = Retry(
+                total=HTTP_RETRIES,
+                backoff_factor=HTTP_BACKOFF,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=frozenset(["GET"])
+            )
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=HTTP_MAX_WORKERS, thread_name_prefix="fetcher")
+        return _executor
+
+
+def _cache_lifetime(cache_control, now):
+    """Срок свежести ответа по Cache-Control: (хранить ли ответ, до какого момента он свеж)"""
+    directives = {}
+    for part in cache_control.split(","):
+        name, _, value = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = value
+    if "no-store" in directives:
+        return False, None
+    max_age = directives.get("max-age", "")
+    if "no-cache" in directives or not max_age.isdigit():
+        return True, None
+    return True, now + timedelta(seconds=int(max_age))
+
+
+def _count(name):
+    with _lock:
+        _cache_stats[name] += 1
+
+
+def get_cache_stats():
+    """Счётчики кэша ответов: hits — свежий ответ без запроса, skipped — запрос пропущен
+    по календарю публикаций ЕЦБ, not_modified — ответ 304, misses — полный ответ"""
+    with _lock:
+        return {**_cache_stats, "size": len(_cache)}
+
+
+def get_json(url: str, publication_aware=False):
+    """GET-запрос с таймаутами через общую сессию, возвращает разобранный JSON
+
+    Ответы кэшируются по URL. Свежий по Cache-Control ответ отдаётся без запроса,
+    иначе запрос отправляется условным (If-None-Match / If-Modified-Since).
+    При publication_aware=True запрос не отправляется, пока по календарю ЕЦБ
+    не могли выйти новые курсы. Возвращаемый объект общий для всех вызовов — не изменять.
+    """
+    now = datetime.utcnow()
+    with _lock:
+        entry = _cache.get(url)
+        if entry:
+            _cache.move_to_end(url)
+    if entry:
+        if entry["expires_at"] and now < entry["expires_at"]:
+            _count("hits")
+            return entry["body"]
+        if publication_aware and not publication_pending(entry["fetched_at"], now):
+            _count("skipped")
+            return entry["body"]
+
+    headers = {}
+    if entry and entry["etag"]:
+        headers["If-None-Match"] = entry["etag"]
+    if entry and entry["last_modified"]:
+        headers["If-Modified-Since"] = entry["last_modified"]
+    response = get_session().get(url, timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT), headers=headers)
+
+    if entry and response.status_code == 304:
+        _count("not_modified")
+        body = entry["body"]
+    else:
+        response.raise_for_status()
+        _count("misses")
+        body = response.json()
+
+    store, expires_at = _cache_lifetime(response.headers.get("Cache-Control", ""), now)
+    if store:
+        with _lock:
+            _cache[url] = {
+                "body": body,
+                "etag": response.headers.get("ETag") or (entry and entry["etag"]),
+                "last_modified": response.headers.get("Last-Modified") or (entry and entry["last_modified"]),
+                "fetched_at": now,
+                "expires_at": expires_at
+            }
+            _cache.move_to_end(url)
+            while len(_cache) > HTTP_CACHE_SIZE:
+                _cache.popitem(last=False)
+    return body
+
+
+def _run_in_worker(func, item):
+    _worker.active = True
+    try:
+        return func(item)
+    finally:
+        _worker.active = False
+
+
+def get_many(func, items):
+    """Выполняет func(item) для всех items на общем пуле потоков с ограниченной параллельностью
+
+    Возвращает список (item, result, error) в исходном порядке; ошибка одного
+    элемента не прерывает остальные.
+    """
+    items = list(items)
+    if getattr(_worker, "active", False) or len(items) <= 1:
+        # Уже внутри пула или параллелить нечего — выполняем в текущем потоке
+        futures = None
+    else:
+        executor = _get_executor()
+        futures = [executor.submit(_run_in_worker, func, item) for item in items]
+
+    results = []
+    for i, item in enumerate(items):
+        try:
+            result = futures[i].result() if futures else func(item)
+            results.append((item, result, None))
+        except Exception as e:
+            results.append((item, None, e))
+    return results
@@ -0,0 +1,94 @@
+from datetime import date, datetime, time, timedelta
+
+# ЕЦБ публикует курсы около 16:00 по центральноевропейскому времени в рабочие дни TARGET
+PUBLICATION_HOUR = 16
+# Сколько часов после начала публикации опрашивать API: Frankfurter обновляется с задержкой
+PUBLICATION_WINDOW_HOURS = 2
+
+
+def _easter(year):
+    """Дата католической Пасхи (алгоритм Meeus/Jones/Butcher)"""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def is_publication_day(day):
+    """Рабочий день TARGET: будни без 1 января, Страстной пятницы, Пасхального понедельника, 1 мая, 25 и 26 декабря"""
+    if day.weekday() >= 5:
+        return False
+    easter = _easter(day.year)
+    holidays = {
+        date(day.year, 1, 1),
+        easter - timedelta(days=2),
+        easter + timedelta(days=1),
+        date(day.year, 5, 1),
+        date(day.year, 12, 25),
+        date(day.year, 12, 26)
+    }
+    return day not in holidays
+
+
+def _last_sunday(year, month):
+    last = (date(year, month + 1, 1) if month < 12 else date(year + 1, 1, 1)) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() + 1) % 7)
+
+
+def _cet_offset(day):
+    """Смещение центральноевропейского времени от UTC в часах: летом 2, зимой 1"""
+    return 2 if _last_sunday(day.year, 3) < day <= _last_sunday(day.year, 10) else 1
+
+
+def publication_window(day):
+    """Интервал (начало, конец) в UTC, в который ожидается публикация курсов за day"""
+    start = datetime.combine(day, time(PUBLICATION_HOUR)) - timedelta(hours=_cet_offset(day))
+    return start, start + timedelta(hours=PUBLICATION_WINDOW_HOURS)
+
+
+def publication_pending(fetched_at, now=None):
+    """True, если после fetched_at (UTC) могли выйти новые курсы и API стоит опросить
+
+    Пока идёт окно публикации — опрашиваем; после окна, в выходные и праздники —
+    нет, если ответ получен уже после конца последнего окна.
+    """
+    now = now or datetime.utcnow()
+    day = now.date()
+    # Ищем последний рабочий день, окно которого уже началось
+    for _ in range(10):
+        if is_publication_day(day):
+            start, end = publication_window(day)
+            if start <= now:
+                return fetched_at < end
+        day -= timedelta(days=1)
+    return True
+
+
+def expected_publication_date(now=None):
+    """Дата последних курсов, которые уже должны быть опубликованы к моменту now (UTC)"""
+    now = now or datetime.utcnow()
+    day = now.date()
+    for _ in range(10):
+        if is_publication_day(day) and publication_window(day)[0] <= now:
+            return day
+        day -= timedelta(days=1)
+    return day
+
+
+def next_publication_window(now=None):
+    """Ближайшее окно публикации (начало, конец) в UTC, которое начнётся после now"""
+    now = now or datetime.utcnow()
+    day = now.date()
+    while True:
+        if is_publication_day(day):
+            start, end = publication_window(day)
+            if start > now:
+                return start, end
+        day += timedelta(days=1)
@@ -0,0 +1,59 @@
+import json
+import os
+from datetime import datetime
+from app.fetchers.base import RateProvider, round_rate
+
+DEFAULT_FIXTURE_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "ecb_sample.json")
+
+
+class FileProvider(RateProvider):
+    """Курсы из локального JSON-файла — для работы без сети и тестов
+
+    Формат файла: {"base": "EUR", "currencies": {code: name},
+    "rates": {"YYYY-MM-DD": {code: rate}}}. Кросс-курсы считаются через базовую валюту файла.
+    """
+
+    def __init__(self, path=DEFAULT_FIXTURE_PATH):
+        self.path = path
+        self.name = f"file:{os.path.basename(path)}"
+        self.api_url = f"file://{os.path.abspath(path)}"
+        self._data = None
+
+    def _load(self):
+        if self._data is None:
+            with open(self.path, encoding="utf-8") as f:
+                self._data = json.load(f)
+        return self._data
+
+    def _cross(self, day_rates, base, target):
+        data = self._load()
+        vector = {**day_rates, data["base"]: 1.0}
+        if base not in vector or target not in vector:
+            return None
+        return round_rate(vector[target] / vector[base])
+
+    def fetch_latest(self, base: str, targets=None, refresh=False):
+        data = self._load()
+        day = max(data["rates"])
+        targets = targets or [code for code in data["currencies"] if code != base]
+        rates = {}
+        for target in targets:
+            rate = self._cross(data["rates"][day], base, target)
+            if rate is not None:
+                rates[target] = rate
+        if not rates:
+            raise ValueError(f"Нет курсов для {base} в {self.path}")
+        return datetime.strptime(day, "%Y-%m-%d"), rates
+
+    def fetch_base_series(self, base: str, start_date, end_date):
+        result = {}
+        codes = [code for code in self._load()["currencies"] if code != base]
+        for day, day_rates in self._load()["rates"].items():
+            day = datetime.strptime(day, "%Y-%m-%d").date()
+            if start_date <= day <= end_date:
+                vector = {code: self._cross(day_rates, base, code) for code in codes}
+                result[day] = {code: rate for code, rate in vector.items() if rate is not None}
+        return result
+
+    def fetch_currencies(self):
+        return dict(self._load()["currencies"])
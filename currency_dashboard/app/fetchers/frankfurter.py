@@ -1,24 +1,75 @@
-import requests
 from app.db import SessionLocal
-from app.db.models import Source, Currency, CurrencyPair, ExchangeRate
+from app.db.models import CurrencyPair
+from app.db.rates import ensure_currencies, upsert_rates, upsert_latest_rates
+from app.rollups import refresh_rollups
+from app.fetchers.base import RateProvider, get_or_create_source
+from app.fetchers.client import get_json
 from datetime import datetime
 
+API_URL = "https://api.frankfurter.app"
+SOURCE_NAME = "frankfurter.app"
+# Данные API меняются только после публикации курсов ЕЦБ, поэтому все запросы
+# идут через кэш клиента с учётом календаря публикаций
+
+
+def fetch_base_series(base: str, start_date, end_date):
+    """Загружает дневные курсы base ко всем валютам за период одним запросом, возвращает {date: {code: rate}}"""
+    data = get_json(f"{API_URL}/{start_date.isoformat()}..{end_date.isoformat()}?from={base}", publication_aware=True)
+
+    if "rates" not in data:
+        raise ValueError(f"Нет данных от API для {base}: {data}")
+
+    return {
+        datetime.strptime(day, "%Y-%m-%d").date(): rates
+        for day, rates in data["rates"].items()
+    }
+
+
+def fetch_latest(base: str, targets=None, refresh=False):
+    """Загружает последние курсы base к списку валют одним запросом, возвращает (date, {target: rate})
+
+    Без targets API возвращает курсы ко всем поддерживаемым валютам. refresh=True
+    отправляет (условный) запрос и после окна публикации — для опоздавших курсов.
+    """
+    url = f"{API_URL}/latest?from={base}"
+    if targets:
+        url += f"&to={','.join(targets)}"
+    data = get_json(url, publication_aware=not refresh)
+
+    if "rates" not in data:
+        raise ValueError(f"Нет данных от API для {base}: {data}")
+
+    return datetime.strptime(data["date"], "%Y-%m-%d"), data["rates"]
+
+
+def fetch_currencies():
+    """Загружает справочник валют API, возвращает {code: name}"""
+    return get_json(f"{API_URL}/currencies", publication_aware=True)
+
+
+class FrankfurterProvider(RateProvider):
+    """Курсы ЕЦБ через Frankfurter API"""
+    name = SOURCE_NAME
+    api_url = API_URL
+
+    def fetch_latest(self, base: str, targets=None, refresh=False):
+        return fetch_latest(base, targets, refresh)
+
+    def fetch_base_series(self, base: str, start_date, end_date):
+        return fetch_base_series(base, start_date, end_date)
+
+    def fetch_currencies(self):
+        return fetch_currencies()
+
 
 def fetch_exchange_rate(base: str, target: str):
     session = SessionLocal()
     try:
         # 1. Источник
-        source_name = "frankfurter.app"
-        source = session.query(Source).filter_by(name=source_name).first()
-        if not source:
-            source = Source(name=source_name, api_url="https://api.frankfurter.app")
-            session.add(source)
-            session.commit()
+        source = get_or_create_source(session, FrankfurterProvider())
 
         # 2. Валюты
-        for code in (base, target):
-            if not session.query(Currency).filter_by(code=code).first():
-                session.add(Currency(code=code, name=code))
+        ensure_currencies(session, [base, target])
         session.commit()
 
         # 3. Валютная пара
@@ -33,25 +84,24 @@ def fetch_exchange_rate(base: str, target: str):
             session.commit()
 
         # 4. Запрос к API
-        url = f"https://api.frankfurter.app/latest?from={base}&to={target}"
-        resp = requests.get(url)
-        data = resp.json()
+        timestamp, rates = fetch_latest(base, [target])
 
-        if "rates" not in data or target not in data["rates"]:
-            print("Ошибка получения курса:", data)
+        if target not in rates:
+            print("Ошибка получения курса:", rates)
             return
 
-        rate = data["rates"][target]
-        timestamp = datetime.strptime(data["date"], "%Y-%m-%d")
+        rate = rates[target]
 
         # 5. Сохранение
-        record = ExchangeRate(
-            pair_id=pair.id,
-            source_id=source.id,
-            timestamp=timestamp,
-            rate=rate
-        )
-        session.add(record)
+        rows = [{
+            "pair_id": pair.id,
+            "source_id": source.id,
+            "timestamp": timestamp,
+            "rate": rate
+        }]
+        upsert_rates(session, rows)
+        upsert_latest_rates(session, rows)
+        refresh_rollups(session, rows)
         session.commit()
 
         print(f"[OK] {base}->{target}: {rate} на {timestamp.date()}")
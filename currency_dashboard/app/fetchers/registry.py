@@ -0,0 +1,73 @@
+import threading
+from datetime import datetime, timedelta
+from app.cache import provider_cache
+from app.config import RATE_PROVIDERS, RATE_FIXTURE_PATH, PROVIDER_COOLDOWN_SECONDS
+from app.fetchers.frankfurter import FrankfurterProvider
+from app.fetchers.fixture import FileProvider
+
+_lock = threading.Lock()
+_providers = None
+# Последние замеры источников: name -> {"latency": сек, "ok": bool, "checked_at": datetime}
+_stats = {}
+
+
+def _build_provider(key):
+    if key == "frankfurter":
+        return FrankfurterProvider()
+    if key == "file":
+        return FileProvider(RATE_FIXTURE_PATH) if RATE_FIXTURE_PATH else FileProvider()
+    raise ValueError(f"Неизвестный источник курсов: {key}")
+
+
+def get_providers():
+    """Включённые источники курсов в порядке из RATE_PROVIDERS"""
+    global _providers
+    with _lock:
+        if _providers is None:
+            _providers = [_build_provider(key) for key in RATE_PROVIDERS]
+        return list(_providers)
+
+
+def get_primary_provider():
+    """Основной источник — первый в RATE_PROVIDERS; используется для истории и справочников"""
+    return get_providers()[0]
+
+
+def record_latency(provider, seconds, ok):
+    """Запоминает время ответа источника в последнем цикле и публикует замеры для других процессов"""
+    with _lock:
+        _stats[provider.name] = {"latency": seconds, "ok": ok, "checked_at": datetime.utcnow()}
+        stats = {name: dict(stat) for name, stat in _stats.items()}
+    provider_cache.set("stats", stats)
+
+
+def get_provider_stats():
+    """Последние замеры задержки по источникам: опубликованные сборщиком или замеры этого процесса"""
+    with _lock:
+        local = {name: dict(stat) for name, stat in _stats.items()}
+    return provider_cache.get("stats") or local
+
+
+def rank_providers(providers, now=None):
+    """Источники по последним замерам: исправные по возрастанию задержки, затем ещё не опрошенные
+
+    Источник, ответивший ошибкой менее PROVIDER_COOLDOWN_SECONDS назад, пропускается,
+    пока есть другие; после паузы он снова опрашивается последним.
+    """
+    now = now or datetime.utcnow()
+    with _lock:
+        stats = {name: dict(stat) for name, stat in _stats.items()}
+
+    def health(provider):
+        stat = stats.get(provider.name)
+        if stat is None:
+            return 1, 0.0
+        return (0, stat["latency"]) if stat["ok"] else (2, 0.0)
+
+    def cooling(provider):
+        stat = stats.get(provider.name)
+        return (stat is not None and not stat["ok"]
+                and now - stat["checked_at"] < timedelta(seconds=PROVIDER_COOLDOWN_SECONDS))
+
+    ranked = sorted(providers, key=health)
+    return [provider for provider in ranked if not cooling(provider)] or ranked
@@ -0,0 +1,217 @@
+import operator
+from datetime import datetime, time, timedelta
+from sqlalchemy import func, not_, select
+from app.coverage import covered_intervals, last_settled_day, mark_covered, missing_ranges
+from app.db import SessionLocal
+from app.db.models import CoveredRange, ExchangeRate, RateRollup
+from app.db.rates import upsert_rates
+from app.fetchers.base import get_or_create_source
+from app.fetchers.registry import get_primary_provider
+from app.rollups import period_start, refresh_rollups
+from app.triangulation import ensure_vectors, load_vectors
+
+
+def _day_bounds(start, end):
+    """Границы периода [start, end] в виде datetime для фильтра по timestamp"""
+    return datetime.combine(start, time.min), datetime.combine(end + timedelta(days=1), time.min)
+
+
+_COMPARISONS = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "=": operator.eq,
+    "!=": operator.ne
+}
+
+
+def _date_clause(op, day):
+    """Условие на timestamp с точностью до дня"""
+    day_start, day_end = _day_bounds(day, day)
+    if op == "<":
+        return ExchangeRate.timestamp < day_start
+    if op == "<=":
+        return ExchangeRate.timestamp < day_end
+    if op == ">":
+        return ExchangeRate.timestamp >= day_end
+    if op == ">=":
+        return ExchangeRate.timestamp >= day_start
+    same_day = (ExchangeRate.timestamp >= day_start) & (ExchangeRate.timestamp < day_end)
+    return same_day if op == "=" else not_(same_day)
+
+
+def _store_gap(session, pair, source_id, start, end, rates):
+    """Сохраняет загруженные курсы пары за интервал и отмечает интервал покрытым"""
+    rows = [
+        {
+            "pair_id": pair.id,
+            "source_id": source_id,
+            "timestamp": datetime.combine(day, time.min),
+            "rate": rate
+        }
+        for day, rate in rates.items()
+    ]
+    upsert_rates(session, rows)
+    refresh_rollups(session, rows)
+    mark_covered(session, CoveredRange, start, end, pair_id=pair.id)
+    session.commit()
+
+
+def ensure_history(session, pair, start, end):
+    """Дописывает в exchange_rates только те интервалы истории пары, которых ещё нет в БД
+
+    Возвращает True, если история за период загружена полностью, и False,
+    если часть интервалов получить или сохранить не удалось.
+    """
+    end = min(end, last_settled_day())
+    if start > end:
+        return True
+
+    gaps = missing_ranges(covered_intervals(session, CoveredRange, pair_id=pair.id), start, end)
+    if not gaps:
+        return True
+
+    # Курсы пары выводятся из векторов базовых курсов: отдельных запросов к API на пару нет
+    vectors_covered = ensure_vectors(session, gaps[0][0], gaps[-1][1])
+    vectors = load_vectors(session, gaps[0][0], gaps[-1][1])
+    rates = vectors.series(pair.base_currency, pair.target_currency)
+    source = get_or_create_source(session, get_primary_provider())
+    complete = True
+    for gap_start, gap_end in gaps:
+        if missing_ranges(vectors_covered, gap_start, gap_end):
+            print(f"[WARN] Нет базовых курсов для {pair.base_currency}->{pair.target_currency} "
+                  f"за {gap_start}..{gap_end}")
+            complete = False
+            continue
+        try:
+            _store_gap(session, pair, source.id, gap_start, gap_end, {
+                day: rate for day, rate in rates.items() if gap_start <= day <= gap_end
+            })
+        except Exception as e:
+            session.rollback()
+            print(f"[WARN] Не удалось сохранить историю {pair.base_currency}->{pair.target_currency} "
+                  f"за {gap_start}..{gap_end}: {e}")
+            complete = False
+    return complete
+
+
+def get_rate_history(pair, start, end):
+    """Курсы пары за период: читает из БД, докачивая пробелы из API
+
+    Возвращает ([(date, rate), ...], загружена ли история за период полностью).
+    """
+    session = SessionLocal()
+    try:
+        complete = ensure_history(session, pair, start, end)
+
+        range_start, range_end = _day_bounds(start, end)
+        rows = (
+            session.query(ExchangeRate.timestamp, func.avg(ExchangeRate.rate))
+            .filter(
+                ExchangeRate.pair_id == pair.id,
+                ExchangeRate.timestamp >= range_start,
+                ExchangeRate.timestamp < range_end
+            )
+            .group_by(ExchangeRate.timestamp)
+            .order_by(ExchangeRate.timestamp)
+            .all()
+        )
+        return [(timestamp.date(), rate) for timestamp, rate in rows], complete
+    finally:
+        session.close()
+
+
+def get_rate_page(pair, start, end, offset, limit, sort_column="date", descending=False, conditions=()):
+    """Одна страница дневных курсов пары за период с сортировкой и фильтрами в SQL
+
+    conditions — [(колонка, оператор, значение)] для колонок date и rate.
+    Возвращает (строки [(date, rate)], общее число строк с учётом фильтров,
+    загружена ли история за период полностью).
+    """
+    session = SessionLocal()
+    try:
+        complete = ensure_history(session, pair, start, end)
+
+        range_start, range_end = _day_bounds(start, end)
+        rate = func.avg(ExchangeRate.rate).label("rate")
+        query = (
+            session.query(ExchangeRate.timestamp, rate)
+            .filter(
+                ExchangeRate.pair_id == pair.id,
+                ExchangeRate.timestamp >= range_start,
+                ExchangeRate.timestamp < range_end
+            )
+            .group_by(ExchangeRate.timestamp)
+        )
+        for column, op, value in conditions:
+            if column == "date":
+                query = query.filter(_date_clause(op, value))
+            else:
+                query = query.having(_COMPARISONS[op](rate, value))
+
+        total = session.query(func.count()).select_from(query.subquery()).scalar()
+
+        order = ExchangeRate.timestamp if sort_column == "date" else rate
+        query = query.order_by(order.desc() if descending else order.asc(), ExchangeRate.timestamp)
+        rows = query.offset(offset).limit(limit).all()
+        return [(timestamp.date(), value) for timestamp, value in rows], total, complete
+    finally:
+        session.close()
+
+
+def iter_rate_chunks(pairs, start, end, chunk_size=5000):
+    """Курсы нескольких пар за период пачками [(pair_id, date, rate)]
+
+    Строки читаются потоковым курсором, поэтому выгрузка любого периода
+    не загружает его в память целиком.
+    """
+    session = SessionLocal()
+    try:
+        for pair in pairs:
+            ensure_history(session, pair, start, end)
+
+        range_start, range_end = _day_bounds(start, end)
+        stmt = (
+            select(ExchangeRate.pair_id, ExchangeRate.timestamp, func.avg(ExchangeRate.rate))
+            .where(
+                ExchangeRate.pair_id.in_([pair.id for pair in pairs]),
+                ExchangeRate.timestamp >= range_start,
+                ExchangeRate.timestamp < range_end
+            )
+            .group_by(ExchangeRate.pair_id, ExchangeRate.timestamp)
+            .order_by(ExchangeRate.pair_id, ExchangeRate.timestamp)
+            .execution_options(stream_results=True, yield_per=chunk_size)
+        )
+        for chunk in session.execute(stmt).partitions():
+            yield [(pair_id, timestamp.date(), rate) for pair_id, timestamp, rate in chunk]
+    finally:
+        session.close()
+
+
+def get_rate_rollup(pair, start, end, period):
+    """Недельные или месячные агрегаты пары за период
+
+    Возвращает ([(period_start, open, high, low, close, mean)], загружена ли история за период полностью).
+    """
+    session = SessionLocal()
+    try:
+        complete = ensure_history(session, pair, start, end)
+
+        rows = (
+            session.query(
+                RateRollup.period_start, RateRollup.open, RateRollup.high,
+                RateRollup.low, RateRollup.close, RateRollup.mean
+            )
+            .filter(
+                RateRollup.pair_id == pair.id,
+                RateRollup.period == period,
+                RateRollup.period_start >= period_start(start, period),
+                RateRollup.period_start <= end
+            )
+            .order_by(RateRollup.period_start)
+            .all()
+        )
+        return [tuple(row) for row in rows], complete
+    finally:
+        session.close()
@@ -0,0 +1,68 @@
+import datetime
+import os
+import socket
+from sqlalchemy import or_, update
+from sqlalchemy.exc import IntegrityError, OperationalError
+from app.db import SessionLocal
+from app.db.models import LeaderLease
+
+
+def lease_holder():
+    """Идентификатор текущего процесса для таблицы аренды"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def acquire_lease(name, holder, ttl):
+    """Захватывает или продлевает аренду name на ttl секунд; True, если держатель — holder
+
+    Аренду можно взять, если её нет, она истекла или уже принадлежит holder.
+    Проверка и запись выполняются одним UPDATE, поэтому из нескольких процессов
+    аренду получает ровно один.
+    """
+    now = datetime.datetime.utcnow()
+    expires_at = now + datetime.timedelta(seconds=ttl)
+    session = SessionLocal()
+    try:
+        result = session.execute(
+            update(LeaderLease)
+            .where(
+                LeaderLease.name == name,
+                or_(LeaderLease.holder == holder, LeaderLease.expires_at < now)
+            )
+            .values(holder=holder, expires_at=expires_at)
+        )
+        matched = result.rowcount
+        if matched < 0:
+            # DuckDB не сообщает число изменённых строк — сверяем запись аренды в своей транзакции
+            lease = session.get(LeaderLease, name)
+            matched = int(lease is not None and lease.holder == holder and lease.expires_at == expires_at)
+        if matched == 1:
+            session.commit()
+            return True
+        # Строки аренды ещё нет — первая вставка побеждает, остальные получат IntegrityError
+        # (DuckDB сообщает о конфликте при фиксации, как OperationalError)
+        if session.get(LeaderLease, name) is None:
+            session.add(LeaderLease(name=name, holder=holder, expires_at=expires_at))
+            session.commit()
+            return True
+        session.rollback()
+        return False
+    except (IntegrityError, OperationalError):
+        session.rollback()
+        return False
+    finally:
+        session.close()
+
+
+def release_lease(name, holder):
+    """Освобождает аренду, если она принадлежит holder, чтобы резервный процесс не ждал истечения"""
+    session = SessionLocal()
+    try:
+        session.execute(
+            update(LeaderLease)
+            .where(LeaderLease.name == name, LeaderLease.holder == holder)
+            .values(expires_at=datetime.datetime.utcnow() - datetime.timedelta(seconds=1))
+        )
+        session.commit()
+    finally:
+        session.close()
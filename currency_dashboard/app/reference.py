@@ -0,0 +1,72 @@
+from app.cache import info_cache, reference_cache
+from app.db import SessionLocal
+from app.db.init_data import upsert_currencies
+from app.db.models import Currency, ReferenceRate
+from app.db.rates import upsert_reference_rates
+from app.fetchers.client import get_many
+from app.fetchers.registry import get_primary_provider
+
+SNAPSHOT_BASE = "EUR"
+SNAPSHOT_KEY = "snapshot"
+
+
+def _load_snapshot():
+    """Читает справочник валют и последний снимок курсов из БД"""
+    session = SessionLocal()
+    try:
+        currencies = dict(session.query(Currency.code, Currency.name).all())
+        rows = session.query(ReferenceRate.currency_code, ReferenceRate.rate, ReferenceRate.date).all()
+        return {
+            "currencies": currencies,
+            "rates": {code: rate for code, rate, _ in rows},
+            "date": max((day for _, _, day in rows), default=None)
+        }
+    finally:
+        session.close()
+
+
+def get_reference_snapshot():
+    """Снимок для /info: {"currencies": {code: name}, "rates": {code: rate к EUR}, "date": datetime}
+
+    Берётся из памяти, при промахе — из БД; к внешнему API не обращается.
+    """
+    snapshot = info_cache.get(SNAPSHOT_KEY)
+    if snapshot is None:
+        snapshot = _load_snapshot()
+        # Пустой снимок не кэшируем, чтобы страница подхватила первое обновление сразу
+        if snapshot["currencies"]:
+            info_cache.set(SNAPSHOT_KEY, snapshot)
+    return snapshot
+
+
+def refresh_reference_snapshot():
+    """Загружает справочник валют и курсы к EUR, сохраняет их в БД и обновляет кэш"""
+    provider = get_primary_provider()
+    (_, currencies, currencies_error), (_, latest, latest_error) = get_many(
+        lambda fetch: fetch(),
+        [provider.fetch_currencies, lambda: provider.fetch_latest(SNAPSHOT_BASE)]
+    )
+    if currencies_error or latest_error:
+        print(f"[WARN] Не удалось обновить справочник валют: {currencies_error or latest_error}")
+        return
+
+    timestamp, rates = latest
+    session = SessionLocal()
+    try:
+        upsert_currencies(session, currencies)
+        upsert_reference_rates(session, SNAPSHOT_BASE, timestamp, {
+            code: rate for code, rate in rates.items() if code in currencies
+        })
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        print("Ошибка при сохранении справочника валют:", str(e))
+        return
+    finally:
+        session.close()
+
+    reference_cache.invalidate("currency_options")
+    # Новый снимок попадает в новое поколение кэша и виден всем процессам
+    info_cache.invalidate()
+    info_cache.set(SNAPSHOT_KEY, _load_snapshot())
+    print(f"[OK] Справочник валют обновлён: {len(currencies)} валют, курсы на {timestamp.date()}")
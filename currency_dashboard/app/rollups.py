@@ -0,0 +1,85 @@
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from sqlalchemy import func
+from app.db.models import ExchangeRate
+from app.db.rates import upsert_rollups
+
+PERIODS = ("week", "month")
+# Сколько точек должно остаться на графике, чтобы перейти на более крупный агрегат
+MIN_ROLLUP_POINTS = 52
+
+
+def period_start(day, period):
+    """Первый день недели (понедельник) или месяца, в который попадает day"""
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def period_end(day, period):
+    """Последний день недели или месяца, в который попадает day"""
+    if period == "week":
+        return period_start(day, period) + timedelta(days=6)
+    next_month = (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return next_month - timedelta(days=1)
+
+
+def choose_period(start, end):
+    """Самая крупная детализация (day, week, month), при которой за период остаётся достаточно точек"""
+    days = (end - start).days + 1
+    if days / 30.44 >= MIN_ROLLUP_POINTS:
+        return "month"
+    if days / 7 >= MIN_ROLLUP_POINTS:
+        return "week"
+    return "day"
+
+
+def refresh_rollups(session, rows):
+    """Пересчитывает недельные и месячные агрегаты, затронутые записанными курсами
+
+    rows — те же словари, что переданы в upsert_rates. Пересчитываются только
+    периоды, в которые попали их даты; дневные курсы читаются одним запросом.
+    Вызывается в той же транзакции, что и upsert_rates.
+    """
+    if not rows:
+        return
+    touched = {
+        (row["pair_id"], period, period_start(row["timestamp"].date(), period))
+        for row in rows
+        for period in PERIODS
+    }
+    days = [row["timestamp"].date() for row in rows]
+    span_start = min(period_start(min(days), period) for period in PERIODS)
+    span_end = max(period_end(max(days), period) for period in PERIODS)
+
+    daily = (
+        session.query(ExchangeRate.pair_id, ExchangeRate.timestamp, func.avg(ExchangeRate.rate))
+        .filter(
+            ExchangeRate.pair_id.in_({row["pair_id"] for row in rows}),
+            ExchangeRate.timestamp >= datetime.combine(span_start, time.min),
+            ExchangeRate.timestamp < datetime.combine(span_end + timedelta(days=1), time.min)
+        )
+        .group_by(ExchangeRate.pair_id, ExchangeRate.timestamp)
+        .order_by(ExchangeRate.pair_id, ExchangeRate.timestamp)
+    )
+    buckets = defaultdict(list)
+    for pair_id, timestamp, rate in daily:
+        for period in PERIODS:
+            key = (pair_id, period, period_start(timestamp.date(), period))
+            if key in touched:
+                buckets[key].append(float(rate))
+
+    upsert_rollups(session, [
+        {
+            "pair_id": pair_id,
+            "period": period,
+            "period_start": start,
+            "open": rates[0],
+            "high": max(rates),
+            "low": min(rates),
+            "close": rates[-1],
+            "mean": sum(rates) / len(rates),
+            "days": len(rates)
+        }
+        for (pair_id, period, start), rates in buckets.items()
+    ])
@@ -1,47 +1,180 @@
 from apscheduler.schedulers.background import BackgroundScheduler
-import requests
-from datetime import datetime
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta, timezone
+import math
+import time
+import numpy as np
+from app.cache import rate_cache
+from app.config import (
+    INFO_REFRESH_INTERVAL, PROVIDER_WAIT_SECONDS, SCHEDULER_MODE, SCHEDULER_POLL_SECONDS,
+    SCHEDULER_FAST_POLL_SECONDS, SCHEDULER_RETRY_SECONDS, SCHEDULER_NEW_PAIR_SECONDS
+)
 from app.db import SessionLocal
-from app.db.models import CurrencyPair, Source, Currency, ExchangeRate
+from app.db.models import CurrencyPair, LatestRate
+from app.db.rates import upsert_base_rates, upsert_rates, upsert_latest_rates
+from app.fetchers.base import get_or_create_source, round_rate
+from app.fetchers.client import get_cache_stats
+from app.fetchers.ecb_calendar import expected_publication_date, next_publication_window, publication_window
+from app.fetchers.registry import get_providers, rank_providers, record_latency
+from app.reference import refresh_reference_snapshot
+from app.rollups import refresh_rollups
+from app.triangulation import TRIANGULATION_BASE, RateVectors
+from app.views import get_viewed_pair_ids
+
+COLLECT_JOB = "fetch_all_pairs"
+
+# Отдельный пул для опроса источников
+_provider_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="provider")
+
+
+def _collect_from_provider(provider, refresh=False):
+    """Запрашивает у источника вектор курсов базовой валюты и замеряет время ответа"""
+    started = time.perf_counter()
+    try:
+        timestamp, rates = provider.fetch_latest(TRIANGULATION_BASE, refresh=refresh)
+    except Exception:
+        record_latency(provider, time.perf_counter() - started, ok=False)
+        raise
+    latency = time.perf_counter() - started
+    record_latency(provider, latency, ok=True)
+    print(f"[INFO] Источник {provider.name}: {latency:.3f} с, валют в векторе: {len(rates)}")
+    return timestamp, rates
+
+
+def _freshest_vector(providers, refresh=False):
+    """Опрашивает источники параллельно и берёт самый свежий из ответов, пришедших за PROVIDER_WAIT_SECONDS
+
+    Медленный источник не задерживает цикл: его ждут, только если вовремя не ответил никто.
+    Быстрый источник с устаревшими данными (например, локальный файл) не побеждает
+    свежий; из ответов на одну дату выбирается источник с лучшими замерами.
+    """
+    providers = rank_providers(providers)
+    futures = {_provider_pool.submit(_collect_from_provider, provider, refresh): provider for provider in providers}
+    results = []
+    done, pending = wait(futures, timeout=PROVIDER_WAIT_SECONDS)
+    while True:
+        for future in done:
+            provider = futures[future]
+            try:
+                results.append((provider, future.result()))
+            except Exception as e:
+                print(f"[WARN] Источник {provider.name} недоступен: {e}")
+        if results or not pending:
+            break
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+    for future in pending:
+        # Ответ опоздавшего источника всё равно попадёт в его замеры
+        print(f"[INFO] Источник {futures[future].name} не ответил за {PROVIDER_WAIT_SECONDS} с, цикл его не ждёт")
+    if not results:
+        return None, None
+    rank = {provider.name: index for index, provider in enumerate(providers)}
+    return max(results, key=lambda item: (item[1][0], -rank[item[0].name]))
 
 
 def fetch_and_save_all_pairs():
+    """Собирает последние курсы всех пар со всех включённых источников
+
+    Каждому источнику — один запрос за вектором курсов базовой валюты;
+    курсы пар выводятся из него триангуляцией, в БД пишется
+    самый свежий ответ исправных источников. Пары, чей последний курс
+    не изменился или новее полученного, не перезаписываются.
+    """
     session = SessionLocal()
     try:
-        source_name = "frankfurter.app"
-        source = session.query(Source).filter_by(name=source_name).first()
-        if not source:
-            source = Source(name=source_name, api_url="https://api.frankfurter.app")
-            session.add(source)
-            session.commit()
-
         pairs = session.query(CurrencyPair).all()
-        for pair in pairs:
-            base = pair.base_currency
-            target = pair.target_currency
-
-            url = f"https://api.frankfurter.app/latest?from={base}&to={target}"
-            response = requests.get(url)
-            data = response.json()
-
-            if "rates" not in data or target not in data["rates"]:
-                print(f"[WARN] Нет курса для {base}->{target}")
-                continue
-
-            rate_value = data["rates"][target]
-            timestamp = datetime.strptime(data["date"], "%Y-%m-%d")
-
-            # Записываем в базу
-            record = ExchangeRate(
-                pair_id=pair.id,
-                source_id=source.id,
-                timestamp=timestamp,
-                rate=rate_value
-            )
-            session.add(record)
-            session.commit()
+        viewed = get_viewed_pair_ids(session)
+        known = {
+            pair_id: (timestamp, rate)
+            for pair_id, timestamp, rate in session.query(LatestRate.pair_id, LatestRate.timestamp, LatestRate.rate)
+        }
+        # Курсы последнего дня публикации ещё не получены — опоздавшую публикацию
+        # запрашиваем и после окна, не полагаясь на календарь в кэше HTTP
+        newest = max((timestamp for timestamp, _ in known.values()), default=None)
+        overdue = newest is None or newest.date() < expected_publication_date()
+        providers = get_providers()
+        # Счётчики кэша HTTP общие для процесса — для цикла считаем их прирост
+        before = get_cache_stats()
+
+        provider, latest = _freshest_vector(providers, refresh=overdue) if pairs else (None, None)
+        rows = []
+        unchanged = 0
+        stale = 0
+        if provider is not None:
+            source = get_or_create_source(session, provider)
+            print(f"[INFO] Курсы цикла взяты из {provider.name}")
+
+            timestamp, rates = latest
+            vector = {**rates, TRIANGULATION_BASE: 1.0}
+            vectors = RateVectors.from_rows([(timestamp.date(), code, rate) for code, rate in vector.items()])
+            # Курсы всех пар за один проход по вектору дня
+            cross = vectors.cross([(pair.base_currency, pair.target_currency) for pair in pairs])[0]
+            for pair, rate in zip(pairs, cross):
+                base, target = pair.base_currency, pair.target_currency
+                if np.isnan(rate):
+                    print(f"[WARN] Нет курса для {base}->{target}")
+                    continue
+
+                rate = round_rate(float(rate))
+                # Курс сравнивается с допуском: в таблицах, ещё не переведённых на DOUBLE, он хранится с одинарной точностью
+                if pair.id in known and known[pair.id][0] == timestamp and math.isclose(known[pair.id][1], rate, rel_tol=1e-7):
+                    unchanged += 1
+                    continue
+                if pair.id in known and known[pair.id][0] > timestamp:
+                    # В БД уже курс за более позднюю дату — старый ответ его не заменяет
+                    stale += 1
+                    continue
+                rows.append({
+                    "pair_id": pair.id,
+                    "source_id": source.id,
+                    "timestamp": timestamp,
+                    "rate": rate
+                })
+                print(f"[OK] {base}->{target}: {rate} на {timestamp.date()}")
 
-            print(f"[OK] {base}->{target}: {rate_value} на {timestamp.date()}")
+        # Записываем вектор дня и все курсы цикла одним upsert в одной транзакции:
+        # повторный сбор того же дня обновляет строку, а не плодит дубликаты.
+        # latest_rates и недельные/месячные агрегаты обновляются в той же транзакции
+        started = time.perf_counter()
+        if rows:
+            upsert_base_rates(session, {latest[0].date(): latest[1]})
+        upsert_rates(session, rows)
+        upsert_latest_rates(session, rows)
+        refresh_rollups(session, rows)
+        session.commit()
+        elapsed = time.perf_counter() - started
+        if rows:
+            # Истории и графики в кэшах всех веб-процессов устарели
+            rate_cache.invalidate()
+        rows_per_sec = len(rows) / elapsed if elapsed > 0 else 0.0
+
+        after = get_cache_stats()
+        cache = {name: after[name] - before[name] for name in ("hits", "skipped", "not_modified", "misses")}
+        # Запросы в сеть — полные ответы и 304; ответы из кэша и чтение файла запросами не считаются
+        http_calls = cache["misses"] + cache["not_modified"]
+        print(f"[INFO] Цикл автосбора: {len(pairs)} пар, HTTP-запросов: {http_calls}, "
+              f"записано строк: {len(rows)} за {elapsed:.3f} с ({rows_per_sec:.0f} строк/с), "
+              f"без изменений: {unchanged}, устаревших: {stale}; "
+              f"кэш HTTP: свежих {cache['hits']}, пропущено по календарю {cache['skipped']}, "
+              f"304 — {cache['not_modified']}, полных ответов {cache['misses']}")
+        return {
+            "pairs": len(pairs),
+            "http_calls": http_calls,
+            "http_cache": cache,
+            "source": provider.name if provider else None,
+            "rows": len(rows),
+            "write_seconds": elapsed,
+            "rows_per_sec": rows_per_sec,
+            "unchanged": unchanged,
+            "stale": stale,
+            "viewed": len(viewed),
+            # Пары, у которых после цикла так и нет последнего курса
+            "missing": len({pair.id for pair in pairs} - set(known) - {row["pair_id"] for row in rows}),
+            # Планировщик ориентируется на самые свежие курсы — полученные или уже сохранённые
+            "date": max(
+                (timestamp.date() for timestamp in (latest and latest[0], newest) if timestamp),
+                default=None
+            )
+        }
 
     except Exception as e:
         session.rollback()
@@ -51,14 +184,101 @@ def fetch_and_save_all_pairs():
         session.close()
 
 
+def plan_next_run(observed_date, viewed, now=None, missing=0):
+    """Момент следующего полезного сбора (UTC) по дате полученных курсов и календарю публикаций ЕЦБ"""
+    now = now or datetime.utcnow()
+    if missing:
+        # У части пар ещё нет курса — не ждём окна публикации: повторный ответ
+        # за тот же день приходит из кэша HTTP и почти ничего не стоит
+        return now + timedelta(seconds=SCHEDULER_NEW_PAIR_SECONDS)
+    expected = expected_publication_date(now)
+    if observed_date is not None and observed_date >= expected:
+        # Курсы за последний день публикации уже получены — ждём следующего окна
+        return next_publication_window(now)[0]
+    if now < publication_window(expected)[1]:
+        # Идёт окно публикации: опрашиваем чаще, если пары смотрят в live-режиме
+        return now + timedelta(seconds=SCHEDULER_FAST_POLL_SECONDS if viewed else SCHEDULER_POLL_SECONDS)
+    # Окно прошло, а новых курсов нет — источник опаздывает или день нерабочий
+    return now + timedelta(seconds=SCHEDULER_RETRY_SECONDS)
+
+
+def _adaptive_collect(scheduler):
+    """Цикл сбора, после которого следующий запуск переносится на рассчитанный момент"""
+    result = fetch_and_save_all_pairs()
+    if result is None:
+        next_run = datetime.utcnow() + timedelta(seconds=SCHEDULER_RETRY_SECONDS)
+    else:
+        next_run = plan_next_run(result["date"], result["viewed"], missing=result["missing"])
+    scheduler.modify_job(COLLECT_JOB, next_run_time=next_run.replace(tzinfo=timezone.utc))
+    print(f"[INFO] Следующий сбор курсов: {next_run:%Y-%m-%d %H:%M:%S} UTC")
+
+
+def _collect_new_pairs(scheduler):
+    """Переносит сбор на сейчас, если появились пары без последнего курса
+
+    Пару могут добавить после цикла дня, когда следующий сбор запланирован
+    только на окно публикации через несколько дней.
+    """
+    session = SessionLocal()
+    try:
+        missing = (
+            session.query(CurrencyPair.id)
+            .outerjoin(LatestRate, LatestRate.pair_id == CurrencyPair.id)
+            .filter(LatestRate.pair_id.is_(None))
+            .count()
+        )
+    finally:
+        session.close()
+    if not missing:
+        return
+    job = scheduler.get_job(COLLECT_JOB)
+    now = datetime.now(timezone.utc)
+    if job is not None and job.next_run_time is not None and job.next_run_time > now + timedelta(seconds=SCHEDULER_NEW_PAIR_SECONDS):
+        print(f"[INFO] Пар без курса: {missing}, сбор переносится на сейчас")
+        scheduler.modify_job(COLLECT_JOB, next_run_time=now)
+
+
 def start_scheduler():
-    scheduler = BackgroundScheduler()
+    # Один экземпляр задачи одновременно; пропущенные запуски схлопываются в один
+    scheduler = BackgroundScheduler(job_defaults={"max_instances": 1, "coalesce": True, "misfire_grace_time": 60})
+    if SCHEDULER_MODE == "interval":
+        scheduler.add_job(
+            func=fetch_and_save_all_pairs,
+            trigger="interval",
+            minutes=1,  # можно изменить на 60 для часового интервала
+            id=COLLECT_JOB,
+            replace_existing=True
+        )
+    else:
+        # Первый сбор сразу, дальше — в момент, рассчитанный по итогам цикла.
+        # Часовой интервал — запасной запуск, если перенос не сработал
+        scheduler.add_job(
+            func=_adaptive_collect,
+            args=[scheduler],
+            trigger="interval",
+            hours=1,
+            next_run_time=datetime.now(),
+            id=COLLECT_JOB,
+            replace_existing=True
+        )
+        # Новые пары получают курс в течение минуты, а не в следующее окно публикации
+        scheduler.add_job(
+            func=_collect_new_pairs,
+            args=[scheduler],
+            trigger="interval",
+            seconds=SCHEDULER_NEW_PAIR_SECONDS,
+            id="collect_new_pairs",
+            replace_existing=True
+        )
+    # Снимок справочника для /info: сразу при запуске и далее периодически
     scheduler.add_job(
-        func=fetch_and_save_all_pairs,
+        func=refresh_reference_snapshot,
         trigger="interval",
-        minutes=1,  # можно изменить на 60 для часового интервала
-        id="fetch_all_pairs",
+        seconds=INFO_REFRESH_INTERVAL,
+        next_run_time=datetime.now(),
+        id="refresh_reference_snapshot",
         replace_existing=True
     )
     scheduler.start()
     print("[INFO] Планировщик автосбора запущен")
+    return scheduler
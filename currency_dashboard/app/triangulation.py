@@ -0,0 +1,101 @@
+import numpy as np
+from app.coverage import covered_intervals, last_settled_day, mark_covered, missing_ranges
+from app.db.models import BaseRate, BaseRateRange
+from app.db.rates import upsert_base_rates
+from app.fetchers.base import round_rate
+from app.fetchers.client import get_many
+from app.fetchers.registry import get_primary_provider
+
+# Все курсы хранятся к одной валюте, курс любой пары выводится из двух столбцов
+TRIANGULATION_BASE = "EUR"
+
+
+class RateVectors:
+    """Векторы курсов базовой валюты по датам: матрица dates × codes, пропуски — NaN
+
+    Курс base→target на дату — отношение столбцов target и base,
+    поэтому число запросов к API растёт с числом валют, а не пар.
+    """
+
+    def __init__(self, dates, codes, matrix):
+        self.dates = dates
+        self.codes = codes
+        self.index = {code: i for i, code in enumerate(codes)}
+        self.matrix = matrix
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Строит матрицу из строк (date, code, rate)"""
+        dates = sorted({day for day, _, _ in rows})
+        codes = sorted({code for _, code, _ in rows} | {TRIANGULATION_BASE})
+        date_index = {day: i for i, day in enumerate(dates)}
+        code_index = {code: i for i, code in enumerate(codes)}
+
+        matrix = np.full((len(dates), len(codes)), np.nan)
+        if rows:
+            matrix[
+                [date_index[day] for day, _, _ in rows],
+                [code_index[code] for _, code, _ in rows]
+            ] = [rate for _, _, rate in rows]
+        matrix[:, code_index[TRIANGULATION_BASE]] = 1.0
+        return cls(dates, codes, matrix)
+
+    def cross(self, pairs):
+        """Курсы пар [(base, target)] на все даты: матрица dates × pairs, NaN — нет курса"""
+        # Неизвестная валюта указывает на дополнительный столбец из NaN
+        missing = len(self.codes)
+        padded = np.hstack([self.matrix, np.full((len(self.dates), 1), np.nan)])
+        bases = [self.index.get(base, missing) for base, _ in pairs]
+        targets = [self.index.get(target, missing) for _, target in pairs]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return padded[:, targets] / padded[:, bases]
+
+    def series(self, base, target):
+        """Дневные курсы одной пары без пропусков: {date: rate}"""
+        column = self.cross([(base, target)])[:, 0]
+        return {
+            day: round_rate(float(rate))
+            for day, rate in zip(self.dates, column)
+            if not np.isnan(rate)
+        }
+
+
+def store_vectors(session, start, end, vectors):
+    """Сохраняет векторы {date: {code: rate}} за интервал и отмечает интервал загруженным"""
+    upsert_base_rates(session, vectors)
+    mark_covered(session, BaseRateRange, start, end)
+    session.commit()
+
+
+def ensure_vectors(session, start, end):
+    """Докачивает векторы базовых курсов за недостающие интервалы, по одному запросу на интервал
+
+    Возвращает загруженные интервалы после докачки.
+    """
+    end = min(end, last_settled_day())
+    covered = covered_intervals(session, BaseRateRange)
+    gaps = missing_ranges(covered, start, end) if start <= end else []
+    if not gaps:
+        return covered
+
+    provider = get_primary_provider()
+    fetched = get_many(lambda gap: provider.fetch_base_series(TRIANGULATION_BASE, *gap), gaps)
+    for (gap_start, gap_end), vectors, error in fetched:
+        try:
+            if error:
+                raise error
+            store_vectors(session, gap_start, gap_end, vectors)
+        except Exception as e:
+            session.rollback()
+            print(f"[WARN] Не удалось загрузить базовые курсы за {gap_start}..{gap_end}: {e}")
+    return covered_intervals(session, BaseRateRange)
+
+
+def load_vectors(session, start, end):
+    """Векторы базовых курсов за период из base_rates"""
+    rows = (
+        session.query(BaseRate.date, BaseRate.currency_code, BaseRate.rate)
+        .filter(BaseRate.date >= start, BaseRate.date <= end)
+        .all()
+    )
+    return RateVectors.from_rows(rows)
@@ -0,0 +1,35 @@
+import datetime
+import time
+from app.config import PAIR_VIEW_TTL
+from app.db import SessionLocal
+from app.db.models import PairView
+from app.db.rates import upsert_pair_view
+
+# Время последней записи просмотра по паре в этом процессе: пишем не чаще раза в минуту
+_recorded = {}
+RECORD_INTERVAL = 60
+
+
+def record_pair_view(pair_id):
+    """Отмечает, что пару смотрят в live-режиме; сборщик опрашивает API чаще, пока её смотрят"""
+    pair_id = int(pair_id)
+    now = time.monotonic()
+    if now - _recorded.get(pair_id, -RECORD_INTERVAL) < RECORD_INTERVAL:
+        return
+    _recorded[pair_id] = now
+
+    session = SessionLocal()
+    try:
+        upsert_pair_view(session, pair_id, datetime.datetime.utcnow())
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        print(f"[WARN] Не удалось отметить просмотр пары {pair_id}: {e}")
+    finally:
+        session.close()
+
+
+def get_viewed_pair_ids(session):
+    """Пары, которые смотрели в live-режиме за последние PAIR_VIEW_TTL секунд"""
+    since = datetime.datetime.utcnow() - datetime.timedelta(seconds=PAIR_VIEW_TTL)
+    return {pair_id for (pair_id,) in session.query(PairView.pair_id).filter(PairView.viewed_at >= since)}
@@ -0,0 +1,61 @@
+import os
+import time
+
+ASSETS_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+
+
+def create_app(started=None):
+    """Создаёт Dash-приложение без обращений к БД и внешним API
+
+    started — значение time.perf_counter() в начале загрузки процесса. Время
+    импорта модулей и сборки приложения сохраняется в server.config["BOOT_TIMING"]
+    и отдаётся маршрутом /health.
+    """
+    created = time.perf_counter()
+    import dash_bootstrap_components as dbc
+    from dash import Dash
+    from flask import jsonify
+    from app.cache import get_all_cache_stats
+    from app.fetchers.client import get_cache_stats
+    from app.fetchers.registry import get_provider_stats
+    from app.dashboard.callbacks import register_callbacks
+    from app.dashboard.export import register_export_routes
+    from app.dashboard.layout import get_main_layout
+    imported = time.perf_counter()
+
+    app = Dash(
+        __name__,
+        # Стили и клиентские функции (переключение темы) лежат в app/assets
+        assets_folder=ASSETS_FOLDER,
+        external_stylesheets=[dbc.themes.BOOTSTRAP],
+        suppress_callback_exceptions=True  # Включаем для multipage
+    )
+    server = app.server
+
+    # Используем главный layout с системой роутинга
+    app.layout = get_main_layout()
+    register_callbacks(app)
+    register_export_routes(server)
+
+    ready = time.perf_counter()
+    started = created if started is None else started
+    timing = {
+        "boot_seconds": round(ready - started, 3),
+        "import_seconds": round(imported - started, 3),
+        "build_seconds": round(ready - imported, 3)
+    }
+    server.config["BOOT_TIMING"] = timing
+    print(f"[INFO] Веб-приложение готово за {timing['boot_seconds']} с "
+          f"(импорт {timing['import_seconds']} с, сборка {timing['build_seconds']} с)")
+
+    @server.route("/health")
+    def health():
+        return jsonify({
+            "status": "ok",
+            "boot": server.config["BOOT_TIMING"],
+            "http_cache": get_cache_stats(),
+            "cache": get_all_cache_stats(),
+            "providers": get_provider_stats()
+        })
+
+    return app
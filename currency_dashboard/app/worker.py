@@ -0,0 +1,34 @@
+import time
+from app.config import COLLECTOR_LEASE_TTL, COLLECTOR_LEASE_RENEW
+from app.leader import acquire_lease, lease_holder, release_lease
+from app.scheduler import start_scheduler
+
+COLLECTOR_LEASE = "collector"
+
+
+def run_collector():
+    """Процесс сборщика курсов: планировщик работает, только пока процесс держит аренду
+
+    Запущенные на других машинах экземпляры ждут в резерве и подхватывают
+    сбор, если ведущий остановился и не продлил аренду.
+    """
+    holder = lease_holder()
+    scheduler = None
+    try:
+        while True:
+            leader = acquire_lease(COLLECTOR_LEASE, holder, COLLECTOR_LEASE_TTL)
+            if leader and scheduler is None:
+                print(f"[INFO] {holder}: получена роль сборщика курсов")
+                scheduler = start_scheduler()
+            elif not leader and scheduler is not None:
+                # Аренду не удалось продлить вовремя — её мог взять другой экземпляр
+                print(f"[WARN] {holder}: роль сборщика потеряна, планировщик остановлен")
+                scheduler.shutdown(wait=False)
+                scheduler = None
+            elif not leader:
+                print(f"[INFO] {holder}: сборщик уже запущен в другом процессе, ожидание")
+            time.sleep(COLLECTOR_LEASE_RENEW)
+    finally:
+        if scheduler is not None:
+            scheduler.shutdown(wait=False)
+            release_lease(COLLECTOR_LEASE, holder)
@@ -0,0 +1,17 @@
+import argparse
+from datetime import date
+from app.backfill import HISTORY_START, backfill
+from app.config import HTTP_MAX_WORKERS
+from app.db import Base, engine
+
+# Загрузка истории курсов в БД; прерванный запуск продолжается с последнего сохранённого года
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Загрузка истории курсов валютных пар в exchange_rates")
+    parser.add_argument("--pairs", default="all", help='"all", id пар через запятую или коды вида USD/EUR')
+    parser.add_argument("--start", type=date.fromisoformat, default=HISTORY_START, help="Начало периода, YYYY-MM-DD")
+    parser.add_argument("--end", type=date.fromisoformat, default=None, help="Конец периода, YYYY-MM-DD (по умолчанию вчера)")
+    parser.add_argument("--workers", type=int, default=HTTP_MAX_WORKERS, help="Число параллельных запросов к API")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    backfill(args.pairs, args.start, args.end, args.workers)
@@ -0,0 +1,11 @@
+from app.db import Base, engine
+from app.db.maintenance import compact_exchange_rates, rebuild_rollups, widen_rate_columns
+
+# Разовое удаление дубликатов курсов, накопленных до появления уникального ключа
+if __name__ == "__main__":
+    compact_exchange_rates()
+    # Курсы с двойной точностью в таблицах MySQL, созданных с FLOAT
+    widen_rate_columns()
+    # Недельные и месячные агрегаты для курсов, записанных до появления rate_rollups
+    Base.metadata.create_all(bind=engine)
+    rebuild_rollups()
@@ -0,0 +1,9 @@
+import argparse
+from app.db.init_data import init_database
+
+# Создание БД, таблиц и справочника валют; выполняется до первого запуска main.py и worker.py
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Создание БД и заполнение справочника валют")
+    parser.add_argument("--offline", action="store_true", help="Взять справочник валют из встроенного снимка, без обращения к API")
+    args = parser.parse_args()
+    init_database(offline=args.offline)
@@ -4,5 +4,7 @@ conda env create -f environment.yml
 
 echo Активация среды и запуск приложения... Если conda не активируется, запустите скрипт в Anaconda Prompt
 call conda activate currency_dashboard_env
-python app\main.py
+python init_db.py
+start "Currency collector" python worker.py
+python main.py
 pause
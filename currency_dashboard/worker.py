@@ -0,0 +1,8 @@
+from app.worker import run_collector
+
+# Сборщик курсов запускается отдельно от веб-приложения; из нескольких экземпляров работает один
+if __name__ == "__main__":
+    try:
+        run_collector()
+    except KeyboardInterrupt:
+        print("[INFO] Сборщик курсов остановлен")